@@ -7,162 +7,172 @@ If you use this source code of JPRank, please kindly cite its original paper as
 Masoud Reyhani Hamedani and Sang-Wook Kim, Pairwise normalization in SimRank variants: problem, solution, and evaluation. 
 In Proceedings of the 34th ACM/SIGAPP Symposium on Applied Computing, ACM SAC 2019, pp. 534–541, DOI:https://doi.org/10.1145/3297280.3297331
 '''
-from scipy.sparse import csr_matrix
+import warnings
+
+from scipy.sparse import identity
 from sklearn.preprocessing import normalize
 import numpy as np
 
+from checkpoint import Checkpoint
+from convergence import Convergence
+from graph_loader import as_adjacency
+from instrument import as_instrument, structures_nbytes
+from jaccard import binary_adjacency, jaccard_coefficient, intersection_index, extra_values
+from pruning import pruned_rows
+from symmetric import SymmetricMatrix, transposed_blocks
+from top_k import write_top_k
+
 
-def JPRank(graph='', alpha_in=0.0, alpha_out=0.0, beta=0.0, iterations=0, topK=0):
+def jprank_structures(graph='', instrument=None):
     '''
-        :graph: a graph file as edgelist (a text file containing one edge per line)
-        :alpha_in: values of parameter alpha for in-links
-        :alpha_out: values of parameter alpha for out-links
-        :beta: values of parameter beta
-        :iteration: # of total iteration
-        :topK: topK results to be written in an output file by descending order    
+        :graph: a graph file as edgelist (a text file containing one edge per line), or an adjacency matrix loaded by load_graph
+        :instrument: an Instrument receiving the timers and counters of loading and precomputing (see instrument.py)
+        returns a dictionary of the structures that do not depend on parameters: the Jaccard matrices, the intersection
+        indexes, and the column normalized adjacency matrices of both in-links and out-links
     '''
-    decay_factor = 0.8
-    node_set = set ()
-    
     #================================================================================================================
-        # reading graph; constructing the in-link and out-link sets of each node; compress their adjacency matrices
-        # NOTE: we can use networkX for reading the graph as well
+        # reading graph (the adjacency matrix is cached in a compressed binary file);
+        # in in-links adjacency matrix the value of cell (node_1,node_2) is set a 1 and in out-links one, cell (node_2,node_1).
     #================================================================================================================
-    rows = []; cols = []; sign = []; inlink_dict={}
-    rows_out = []; cols_out = []; sign_out = []; outlink_dict={}
-    with open(graph, "r") as f:
-        lines = f.readlines()
-        for line in lines:
-            # ===============================================================================
-                # in in-links adjacency matrix the value of cell (node_1,node_2) is set a 1.
-            # ===============================================================================
-            node_1, node_2 = line.split('\t')[:2]
-            rows.append(int(node_1))
-            cols.append(int(node_2))
-            sign.append(float(1))
-            node_set.update((int(node_1),int(node_2)))            
-            if int(node_2) not in inlink_dict:
-                in_links = set()
-                in_links.add(int(node_1))
-                inlink_dict [int(node_2)] = in_links
-            else:
-                inlink_dict[int(node_2)].add(int(node_1))
-
-            # ================================================================================
-                # in out-links adjacency matrix the value of cell (node_1,node_2) is set a 1.
-            # ================================================================================
-            rows_out.append(int(node_2))
-            cols_out.append(int(node_1))
-            sign_out.append(float(1))            
-            if int(node_1) not in outlink_dict:
-                out_links = set()
-                out_links.add(int(node_2))
-                outlink_dict [int(node_1)] = out_links
-            else:
-                outlink_dict[int(node_1)].add(int(node_2))            
-                
-    ds_size = len(node_set)                              
-    csr_adj_in = csr_matrix((sign, (rows, cols)), shape=(ds_size, ds_size)) ## --- compressed sparse row representation of in-links adjacency matrix
-    csr_adj_out = csr_matrix((sign_out, (rows_out, cols_out)), shape=(ds_size, ds_size)) ## --- compressed sparse row representation of out-links adjacency matrix    
-    f.close()
-    print ('The adjacency matrices are compressed in row format for both in-links and out-links ...')    
+    instrument = as_instrument(instrument)
+    with instrument.phase('load'):
+        csr_adj_in, ds_size = as_adjacency(graph) ## --- compressed sparse row representation of in-links adjacency matrix
+    instrument.count('nodes', ds_size); instrument.count('edges', int(csr_adj_in.sum()))
+    csr_adj_out = csr_adj_in.transpose().tocsr() ## --- compressed sparse row representation of out-links adjacency matrix
+    instrument.message('The adjacency matrices are compressed in row format for both in-links and out-links ...')    
     #========================================================================================================
         # Computing the Jaccard Coefficient for all node pairs; saving them in a compressed symmetric matrix.
+        # The structures are timed apart from loading.
     #========================================================================================================
-    rows = []; cols = []; vals = []; 
-    in_link_pair_dict = {} ## -- keeps the intersection of in-links sets for each node-pair and their length multiplication for future reference 
-    keyList = list (inlink_dict) 
-    for target_node_index in range(0, len(keyList)):
-        for node_index in range(target_node_index, len(keyList)):
-            target_node = keyList[target_node_index]
-            node = keyList[node_index]        
-            intersection = inlink_dict[target_node].intersection(inlink_dict[node])                
-            intersection_size = len(intersection)
-            if intersection_size!=0: ## -- only non-zero values are stored
-                union_size = len(inlink_dict[target_node].union(inlink_dict[node]))
-                rows.append(target_node)
-                cols.append(node)
-                vals.append(intersection_size/float (union_size))
-                rows.append(node)
-                cols.append(target_node)
-                vals.append(intersection_size/float (union_size))
-
-                in_link_pair_dict[(target_node,node)] = (intersection,len(inlink_dict[target_node])*len(inlink_dict[node]))
-                
-    csr_jaccard_in = csr_matrix((vals, (rows, cols)), shape=(ds_size, ds_size)) ## --- compressed sparse row representation of jaccard matrix    
-    rows = []; cols = []; vals = []; 
-    out_link_pair_dict = {} ## -- keeps the intersection of out-links sets for each node-pair and their length multiplication for future reference 
-    keyList = list (outlink_dict)     
-    for target_node_index in range(0, len(keyList)):
-        for node_index in range(target_node_index, len(keyList)):
-            target_node = keyList[target_node_index]
-            node = keyList[node_index]        
-            intersection = outlink_dict[target_node].intersection(outlink_dict[node])                
-            intersection_size = len(intersection)
-            if intersection_size!=0: ## -- only non-zero values are stored
-                union_size = len(outlink_dict[target_node].union(outlink_dict[node]))
-                rows.append(target_node)
-                cols.append(node)
-                vals.append(intersection_size/float (union_size))
-                rows.append(node)
-                cols.append(target_node)
-                vals.append(intersection_size/float (union_size))
+    with instrument.phase('precompute'):
+        csr_jaccard_in = jaccard_coefficient(csr_adj_in) ## --- compressed sparse row representation of jaccard matrix
+        in_link_index = intersection_index(csr_adj_in) ## -- keeps the intersection of in-links sets for each node-pair and their length multiplication for future reference
+        csr_jaccard_out = jaccard_coefficient(csr_adj_out) ## --- compressed sparse row representation of jaccard matrix
+        out_link_index = intersection_index(csr_adj_out) ## -- keeps the intersection of out-links sets for each node-pair and their length multiplication for future reference
+        norm_csr_adj_in = normalize(csr_adj_in, norm='l1', axis=0) ## -- column normalizing the sparse adjacency matrices
+        norm_csr_adj_out = normalize(csr_adj_out, norm='l1', axis=0)
+    instrument.count('jaccard_nnz', int(csr_jaccard_in.nnz), links='in'); instrument.count('jaccard_nnz', int(csr_jaccard_out.nnz), links='out')
+    instrument.count('intersection_pairs', len(in_link_index.scale), links='in'); instrument.count('intersection_pairs', len(out_link_index.scale), links='out')
+    instrument.count('intersection_members', len(in_link_index.members), links='in'); instrument.count('intersection_members', len(out_link_index.members), links='out')
+    instrument.message('Jaccard Coefficient is computed and stored in compressed matrices for both in-links and out-links ...')    
+    return {'csr_jaccard_in': csr_jaccard_in, 'csr_jaccard_out': csr_jaccard_out,
+            'in_link_index': in_link_index, 'out_link_index': out_link_index,
+            'norm_csr_adj_in': norm_csr_adj_in, 'norm_csr_adj_out': norm_csr_adj_out}
 
-                out_link_pair_dict[(target_node,node)] = (intersection,len(outlink_dict[target_node])*len(outlink_dict[node]))
-                
-    csr_jaccard_out = csr_matrix((vals, (rows, cols)), shape=(ds_size, ds_size)) ## --- compressed sparse row representation of jaccard matrix
-    print ('Jaccard Coefficient is computed and stored in compressed matrices for both in-links and out-links ...')    
 
+def JPRank(graph='', alpha_in=0.0, alpha_out=0.0, beta=0.0, iterations=0, topK=0, tolerance=0.0, norm='max', prune_threshold=None, prune_top=None, symmetric=False, block_size=None, file_name='result.txt', structures=None, checkpoint_file=None, checkpoint_every=1, resume_from=None, instrument=None, verbose=True):
+    '''
+        :graph: a graph file as edgelist (a text file containing one edge per line)
+        :alpha_in: values of parameter alpha for in-links
+        :alpha_out: values of parameter alpha for out-links
+        :beta: values of parameter beta
+        :iteration: # of total iteration
+        :topK: topK results to be written in an output file by descending order    
+        :tolerance: the iterations stop when the residual between two consecutive iterates is less than tolerance
+        :norm: the norm of residuals; 'max' (max-abs) or 'fro' (Frobenius)
+        :prune_threshold: if given, scores less than prune_threshold are dropped after each iteration and result_ is kept sparse
+        :prune_top: if given, only top prune_top scores of each row are kept after each iteration and result_ is kept sparse
+        :symmetric: if True, only the upper-triangular tiles of the score matrices are computed and stored (about half of the
+                    memory, but about 10% slower than the dense mode as the extra values gather scores through packed tiles);
+                    the scores agree with the dense mode only up to rounding, so nodes whose scores are tied may be ordered
+                    differently in the topK results (see symmetric.py)
+        :block_size: # of rows (and columns) of tiles (symmetric mode), or # of rows built and pruned at once (pruning)
+        :file_name: the output file of topK results; its extension selects the format, e.g., ".txt", ".gz", or ".npz" (see sinks.py)
+        :structures: the structures returned by jprank_structures(graph); if given, graph is not read again
+        :checkpoint_file: if given, result_ is saved in this file every checkpoint_every iterations (and the structures once)
+        :checkpoint_every: # of iterations between two checkpoints
+        :resume_from: a checkpoint file; the iterations continue from its last saved iteration
+        :instrument: an Instrument (or a callback) receiving the timers and counters of the phases (see instrument.py)
+        :verbose: if False, the progress messages are not printed
+        returns a dictionary containing # of performed iterations, the residual and the elapsed time of each iteration
+        NOTE:
+            Pruning keeps result_ sparse, but the extra values are still gathered over all node pairs of the intersection
+            indexes (whose sizes do not depend on the pruned scores) unless result_ is very sparse; thus, pruning barely
+            saves time or memory for JPRank and may even be slower than the dense computation (a warning is issued).
+    '''
+    decay_factor = 0.8
+    instrument = as_instrument(instrument, verbose, measure='JPRank')
+    pruning = prune_threshold is not None or prune_top is not None
     #===========================================================================
-        # column normalizing the sparse adjacency matrices
+        # the arguments are checked before any structure is loaded or allocated
     #===========================================================================
-    norm_csr_adj_in = normalize(csr_adj_in, norm='l1', axis=0)
-    norm_csr_adj_out = normalize(csr_adj_out, norm='l1', axis=0)
-    iden_matrix = np.identity(ds_size,dtype=float)
+    if symmetric and pruning:
+        raise ValueError('pruning is not supported in symmetric mode')
+    if pruning:
+        warnings.warn('pruning does not reduce the cost of the extra values of JPRank; they are gathered over the whole '
+                      'intersection indexes (see the NOTE of JPRank)', stacklevel=2)
+    params = {'measure': 'JPRank', 'alpha_in': alpha_in, 'alpha_out': alpha_out, 'beta': beta, 'symmetric': symmetric, 'pruning': pruning, 'prune_threshold': prune_threshold, 'prune_top': prune_top,
+              'norm': norm, 'block_size': block_size if symmetric else None} ## -- the tiles of SymmetricMatrix (pruning blocks do not change scores)
+    checkpoint = Checkpoint(checkpoint_file, checkpoint_every, params, instrument)
+    state = checkpoint.resume(resume_from) ## -- the state of the checkpoint to resume from (None if resume_from is not given)
+    if structures is None and state is not None:
+        structures = state['structures']
+    if structures is None:
+        structures = jprank_structures(graph, instrument)
+    instrument.count('structures_bytes', structures_nbytes(structures))
+    csr_jaccard_in, csr_jaccard_out = structures['csr_jaccard_in'], structures['csr_jaccard_out']
+    in_link_index, out_link_index = structures['in_link_index'], structures['out_link_index']
+    norm_csr_adj_in, norm_csr_adj_out = structures['norm_csr_adj_in'], structures['norm_csr_adj_out']
+    ds_size = norm_csr_adj_in.shape[0]
+    if symmetric:
+        blocks_in = transposed_blocks(norm_csr_adj_in, block_size)
+        blocks_out = transposed_blocks(norm_csr_adj_out, block_size)
+    if pruning: ## -- their rows are sliced by the blocks of pruned rows
+        norm_csr_adj_in_t, norm_csr_adj_out_t = norm_csr_adj_in.transpose().tocsr(), norm_csr_adj_out.transpose().tocsr()
+        bin_adj_in, bin_adj_out = binary_adjacency(norm_csr_adj_in), binary_adjacency(norm_csr_adj_out) ## -- the extra values of a sparse result_ may be computed from its non-zero cells
+    iden_matrix = identity(ds_size, dtype=float, format='csr') if pruning or symmetric else np.identity(ds_size,dtype=float) ## -- a sparse identity keeps result_ sparse (or small)
     iden_matrix = iden_matrix * (1.0-decay_factor*beta*(alpha_in-alpha_out)-decay_factor*alpha_out)
-    result_ = iden_matrix ## S_0
-    print ('Column normalization of adjacency matrices and initialization is done ...')
-    print('==============================================================================================================')
+    result_ = SymmetricMatrix(ds_size, block_size) if symmetric else iden_matrix ## S_0
+    if symmetric:
+        result_.add_sparse(iden_matrix)
+    instrument.message('Column normalization of adjacency matrices and initialization is done ...')
+    instrument.message('==============================================================================================================')
     
+    convergence = Convergence(tolerance, norm, instrument)
+    start = 1
+    if state is not None: ## -- the iterations continue from the checkpoint
+        convergence.restore(state['report'])
+        result_ = state['result_']
+        start = iterations+1 if convergence.converged else state['iteration']+1
     ### --- starting the iterative computation 
-    for itr in range (1,iterations+1):
-        print ("Iteration {} .... ".format(itr))
-        #===========================================================================
-            # Calculating the extra values for intersection part of in-links 
-        #===========================================================================
-        rows = []; cols = []; vals = []
-        for tople_ in in_link_pair_dict:
-            intersection_, multi_ = in_link_pair_dict[tople_][:2]                       
-            sum_ = 0
-            for inlink_1 in intersection_:
-                for inlink_2 in intersection_:
-                    sum_ = sum_ + result_[inlink_1,inlink_2]
-            rows.append(tople_[0])        
-            cols.append(tople_[1])
-            vals.append(sum_/(float)(multi_))
-            rows.append(tople_[1])        
-            cols.append(tople_[0])
-            vals.append(sum_/(float)(multi_))                
-                            
-        csr_extra_in = csr_matrix((vals, (rows, cols)), shape=(ds_size, ds_size)) ## --- compressed sparse row representation of extra values matrix
-        
-        rows = []; cols = []; vals = []
-        for tople_ in out_link_pair_dict:
-            intersection_, multi_ = out_link_pair_dict[tople_][:2]                       
-            sum_ = 0
-            for outlink_1 in intersection_:
-                for outlink_2 in intersection_:
-                    sum_ = sum_ + result_[outlink_1,outlink_2]
-            rows.append(tople_[0])        
-            cols.append(tople_[1])
-            vals.append(sum_/(float)(multi_))       
-            rows.append(tople_[1])        
-            cols.append(tople_[0])
-            vals.append(sum_/(float)(multi_))                
-                     
-        csr_extra_out = csr_matrix((vals, (rows, cols)), shape=(ds_size, ds_size)) ## --- compressed sparse row representation of extra values matrix
+    for itr in range (start,iterations+1):
+        with instrument.phase('iteration', iteration=itr):
+            instrument.message("Iteration {} .... ".format(itr))
+            #===========================================================================
+                # Calculating the extra values for intersection part of in-links and out-links
+            #===========================================================================
+            csr_extra_in = extra_values(result_, in_link_index, bin_adj_in if pruning else None) ## --- compressed sparse row representation of extra values matrix
+            csr_extra_out = extra_values(result_, out_link_index, bin_adj_out if pruning else None) ## --- compressed sparse row representation of extra values matrix
 
-        result_ = beta*decay_factor* (alpha_in*csr_jaccard_in + (1.0-alpha_in)*(norm_csr_adj_in.transpose() @ result_ @ norm_csr_adj_in - csr_extra_in)) + \
-                  (1.0-beta)*decay_factor* (alpha_out*csr_jaccard_out + (1.0-alpha_out)*(norm_csr_adj_out.transpose() @ result_ @ norm_csr_adj_out - csr_extra_out)) + \
-                  iden_matrix
+            previous_ = result_
+            if symmetric: ## -- only the upper-triangular tiles are computed
+                result_ = SymmetricMatrix(ds_size, block_size)
+                result_.add_sparse(alpha_in*csr_jaccard_in - (1.0-alpha_in)*csr_extra_in, beta*decay_factor)
+                result_.add_sparse(alpha_out*csr_jaccard_out - (1.0-alpha_out)*csr_extra_out, (1.0-beta)*decay_factor)
+                result_.add_congruence(previous_, blocks_in, beta*decay_factor*(1.0-alpha_in))
+                result_.add_congruence(previous_, blocks_out, (1.0-beta)*decay_factor*(1.0-alpha_out))
+                result_.add_sparse(iden_matrix)
+            elif pruning: ## -- the rows of the next iterate are built and pruned block by block
+                result_q_in, result_q_out = result_ @ norm_csr_adj_in, result_ @ norm_csr_adj_out
+                result_, dropped = pruned_rows(lambda start, end: beta*decay_factor* (alpha_in*csr_jaccard_in[start:end] + (1.0-alpha_in)*(norm_csr_adj_in_t[start:end] @ result_q_in - csr_extra_in[start:end])) + \
+                                                                  (1.0-beta)*decay_factor* (alpha_out*csr_jaccard_out[start:end] + (1.0-alpha_out)*(norm_csr_adj_out_t[start:end] @ result_q_out - csr_extra_out[start:end])) + \
+                                                                  iden_matrix[start:end],
+                                               ds_size, prune_threshold, prune_top, block_size)
+                convergence.record_pruning(dropped, decay_factor*(beta*(1.0-alpha_in)+(1.0-beta)*(1.0-alpha_out)))
+            else:
+                result_ = beta*decay_factor* (alpha_in*csr_jaccard_in + (1.0-alpha_in)*(norm_csr_adj_in.transpose() @ result_ @ norm_csr_adj_in - csr_extra_in)) + \
+                          (1.0-beta)*decay_factor* (alpha_out*csr_jaccard_out + (1.0-alpha_out)*(norm_csr_adj_out.transpose() @ result_ @ norm_csr_adj_out - csr_extra_out)) + \
+                          iden_matrix
+            converged = convergence.update(previous_, result_)
+        instrument.count_iteration(itr, previous_, result_, norm_csr_adj_in, norm_csr_adj_out)
+        checkpoint.save(itr, result_, convergence, structures)
+        if converged: ## -- the tolerance is reached
+            break
+
+    #===========================================================================
+        # writing the topK results of each node in the output file
+    #===========================================================================
+    with instrument.phase('top_k'):
+        write_top_k(result_, topK, file_name, instrument=instrument)
+    return convergence.report()
         
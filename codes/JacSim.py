@@ -7,107 +7,155 @@ If you use this source code of JacSim, please kindly cite its original paper as
 Masoud Reyhani Hamedani and Sang-Wook Kim, JacSim: An accurate and efficient link-based similarity measure in graphs. 
 Information Sciences, Vol. 414, 2017, pp. 203–224, https://doi.org/10.1016/j.ins.2017.06.005
 '''
-from scipy.sparse import csr_matrix
+import warnings
+
+from scipy.sparse import identity
 from sklearn.preprocessing import normalize
 import numpy as np
 
-def JacSim_MF(graph='', alpha=0.0, iterations=0, topK=0):
+from checkpoint import Checkpoint
+from convergence import Convergence
+from graph_loader import as_adjacency
+from instrument import as_instrument, structures_nbytes
+from jaccard import binary_adjacency, jaccard_coefficient, intersection_index, extra_values
+from pruning import pruned_rows
+from symmetric import SymmetricMatrix, transposed_blocks
+from top_k import write_top_k
+
+def jacsim_structures(graph='', instrument=None):
     '''
-        :graph: a graph file as edgelist (a text file containing one edge per line)
-        :alpha: values of parameter alpha 
-        :iteration: # of total iteration
-        :topK: topK results to be written in an output file by descending order    
+        :graph: a graph file as edgelist (a text file containing one edge per line), or an adjacency matrix loaded by load_graph
+        :instrument: an Instrument receiving the timers and counters of loading and precomputing (see instrument.py)
+        returns a dictionary of the structures that do not depend on parameters: the Jaccard matrix, the intersection
+        index of in-links, and the column normalized adjacency matrix
     '''
-    decay_factor = 0.8
-    node_set = set ()
-    
     #============================================================================================
-        # reading graph; constructing the in-link set of each node; compress the adjacency matrix
-        # NOTE: we can use networkX for reading the graph as well
+        # reading graph (the adjacency matrix is cached in a compressed binary file)
     #============================================================================================
-    rows = []; cols = []; sign = []; inlink_dict={}
-    with open(graph, "r") as f:
-        lines = f.readlines()
-        for line in lines:
-            # =================================================
-                # the value of cell (node_1,node_2) is set a 1.
-            # =================================================
-            node_1, node_2 = line.split('\t')[:2]
-            rows.append(int(node_1))
-            cols.append(int(node_2))
-            sign.append(float(1))
-            node_set.update((int(node_1),int(node_2)))            
-            if int(node_2) not in inlink_dict:
-                in_links = set()
-                in_links.add(int(node_1))
-                inlink_dict [int(node_2)] = in_links
-            else:
-                inlink_dict[int(node_2)].add(int(node_1))
-    ds_size = len(node_set)                          
-    csr_adj = csr_matrix((sign, (rows, cols)), shape=(ds_size, ds_size)) ## --- compressed sparse row representation of adjacency matrix
-    f.close()
-    print ('The adjacency matrix is compressed in row format ...')
+    instrument = as_instrument(instrument)
+    with instrument.phase('load'):
+        csr_adj, ds_size = as_adjacency(graph) ## --- compressed sparse row representation of adjacency matrix
+    instrument.count('nodes', ds_size); instrument.count('edges', int(csr_adj.sum()))
+    instrument.message('The adjacency matrix is compressed in row format ...')
     
     #========================================================================================================
         # Computing the Jaccard Coefficient for all node pairs; saving them in a compressed symmetric matrix.
+        # The structures are timed apart from loading.
     #========================================================================================================
-    rows = []; cols = []; vals = []; 
-    in_link_pair_dict = {} ## -- keeps the intersection of in-links sets for each node-pair and their length multiplication for future reference
-    keyList = list (inlink_dict) 
-    for target_node_index in range(0, len(keyList)):
-        for node_index in range(target_node_index, len(keyList)):
-            target_node = keyList[target_node_index]
-            node = keyList[node_index]        
-            intersection = inlink_dict[target_node].intersection(inlink_dict[node])                
-            intersection_size = len(intersection)
-            if intersection_size!=0: ## only non-zero values are stored
-                union_size = len(inlink_dict[target_node].union(inlink_dict[node]))
-                rows.append(target_node)
-                cols.append(node)
-                vals.append(intersection_size/float (union_size))
-
-                rows.append(node)
-                cols.append(target_node)
-                vals.append(intersection_size/float (union_size))
+    with instrument.phase('precompute'):
+        csr_jaccard = jaccard_coefficient(csr_adj) ## --- compressed sparse row representation of jaccard matrix
+        in_link_index = intersection_index(csr_adj) ## -- keeps the intersection of in-links sets for each node-pair and their length multiplication for future reference
+        norm_csr_adj = normalize(csr_adj, norm='l1', axis=0) ## -- column normalizing the sparse adjacency matrix
+    instrument.count('jaccard_nnz', int(csr_jaccard.nnz))
+    instrument.count('intersection_pairs', len(in_link_index.scale)); instrument.count('intersection_members', len(in_link_index.members))
+    instrument.message('Jaccard Coefficient for all nodes is computed and stored in a compressed matrix  ...')    
+    return {'csr_jaccard': csr_jaccard, 'in_link_index': in_link_index, 'norm_csr_adj': norm_csr_adj}
 
-                in_link_pair_dict[(target_node,node)] = (intersection,len(inlink_dict[target_node])*len(inlink_dict[node]))
-                
-    csr_jaccard = csr_matrix((vals, (rows, cols)), shape=(ds_size, ds_size)) ## --- compressed sparse row representation of jaccard matrix
-    print ('Jaccard Coefficient for all nodes is computed and stored in a compressed matrix  ...')    
 
+def JacSim_MF(graph='', alpha=0.0, iterations=0, topK=0, tolerance=0.0, norm='max', prune_threshold=None, prune_top=None, symmetric=False, block_size=None, file_name='result.txt', structures=None, checkpoint_file=None, checkpoint_every=1, resume_from=None, instrument=None, verbose=True):
+    '''
+        :graph: a graph file as edgelist (a text file containing one edge per line)
+        :alpha: values of parameter alpha 
+        :iteration: # of total iteration
+        :topK: topK results to be written in an output file by descending order    
+        :tolerance: the iterations stop when the residual between two consecutive iterates is less than tolerance
+        :norm: the norm of residuals; 'max' (max-abs) or 'fro' (Frobenius)
+        :prune_threshold: if given, scores less than prune_threshold are dropped after each iteration and result_ is kept sparse
+        :prune_top: if given, only top prune_top scores of each row are kept after each iteration and result_ is kept sparse
+        :symmetric: if True, only the upper-triangular tiles of the score matrices are computed and stored (about half of the
+                    memory, but about 10% slower than the dense mode as the extra values gather scores through packed tiles);
+                    the scores agree with the dense mode only up to rounding, so nodes whose scores are tied may be ordered
+                    differently in the topK results (see symmetric.py)
+        :block_size: # of rows (and columns) of tiles (symmetric mode), or # of rows built and pruned at once (pruning)
+        :file_name: the output file of topK results; its extension selects the format, e.g., ".txt", ".gz", or ".npz" (see sinks.py)
+        :structures: the structures returned by jacsim_structures(graph); if given, graph is not read again
+        :checkpoint_file: if given, result_ is saved in this file every checkpoint_every iterations (and the structures once)
+        :checkpoint_every: # of iterations between two checkpoints
+        :resume_from: a checkpoint file; the iterations continue from its last saved iteration
+        :instrument: an Instrument (or a callback) receiving the timers and counters of the phases (see instrument.py)
+        :verbose: if False, the progress messages are not printed
+        returns a dictionary containing # of performed iterations, the residual and the elapsed time of each iteration
+        NOTE:
+            Pruning keeps result_ sparse, but the extra values are still gathered over all node pairs of the intersection
+            index (whose size does not depend on the pruned scores) unless result_ is very sparse; thus, pruning barely
+            saves time or memory for JacSim and may even be slower than the dense computation (a warning is issued).
+    '''
+    decay_factor = 0.8
+    instrument = as_instrument(instrument, verbose, measure='JacSim')
+    pruning = prune_threshold is not None or prune_top is not None
     #===========================================================================
-        # column normalizing the sparse adjacency matrix
+        # the arguments are checked before any structure is loaded or allocated
     #===========================================================================
-    norm_csr_adj = normalize(csr_adj, norm='l1', axis=0)
-    iden_matrix = np.identity(ds_size,dtype=float)
+    if symmetric and pruning:
+        raise ValueError('pruning is not supported in symmetric mode')
+    if pruning:
+        warnings.warn('pruning does not reduce the cost of the extra values of JacSim; they are gathered over the whole '
+                      'intersection index (see the NOTE of JacSim_MF)', stacklevel=2)
+    params = {'measure': 'JacSim', 'alpha': alpha, 'symmetric': symmetric, 'pruning': pruning, 'prune_threshold': prune_threshold, 'prune_top': prune_top,
+              'norm': norm, 'block_size': block_size if symmetric else None} ## -- the tiles of SymmetricMatrix (pruning blocks do not change scores)
+    checkpoint = Checkpoint(checkpoint_file, checkpoint_every, params, instrument)
+    state = checkpoint.resume(resume_from) ## -- the state of the checkpoint to resume from (None if resume_from is not given)
+    if structures is None and state is not None:
+        structures = state['structures']
+    if structures is None:
+        structures = jacsim_structures(graph, instrument)
+    instrument.count('structures_bytes', structures_nbytes(structures))
+    csr_jaccard = structures['csr_jaccard']
+    in_link_index = structures['in_link_index']
+    norm_csr_adj = structures['norm_csr_adj']
+    ds_size = norm_csr_adj.shape[0]
+    if symmetric:
+        blocks = transposed_blocks(norm_csr_adj, block_size)
+    if pruning:
+        norm_csr_adj_t = norm_csr_adj.transpose().tocsr() ## -- its rows are sliced by the blocks of pruned rows
+        bin_adj = binary_adjacency(norm_csr_adj) ## -- the extra values of a sparse result_ may be computed from its non-zero cells
+    iden_matrix = identity(ds_size, dtype=float, format='csr') if pruning or symmetric else np.identity(ds_size,dtype=float) ## -- a sparse identity keeps result_ sparse (or small)
     iden_matrix = iden_matrix * (1.0-decay_factor*alpha)
-    result_ = iden_matrix ## S_0
-    print ('Column normalization of adjacency matrix and initialization is done ...')
-    print('==============================================================================================')
+    result_ = SymmetricMatrix(ds_size, block_size) if symmetric else iden_matrix ## S_0
+    if symmetric:
+        result_.add_sparse(iden_matrix)
+    instrument.message('Column normalization of adjacency matrix and initialization is done ...')
+    instrument.message('==============================================================================================')
     
+    convergence = Convergence(tolerance, norm, instrument)
+    start = 1
+    if state is not None: ## -- the iterations continue from the checkpoint
+        convergence.restore(state['report'])
+        result_ = state['result_']
+        start = iterations+1 if convergence.converged else state['iteration']+1
     ### --- starting the iterative computation 
-    for itr in range (1,iterations+1):
-        print ("Iteration {} .... ".format(itr))
-        #===========================================================================
-            # Calculating the extra values for intersection part of in-links 
-        #===========================================================================
-        rows = []; cols = []; vals = []
-        for tople_ in in_link_pair_dict:
-            intersection_, multi_ = in_link_pair_dict[tople_][:2]                       
-            sum_ = 0
-            for inlink_1 in intersection_:
-                for inlink_2 in intersection_:
-                    sum_ = sum_ + result_[inlink_1,inlink_2]
-            rows.append(tople_[0])        
-            cols.append(tople_[1])
-            vals.append(sum_/(float)(multi_))
+    for itr in range (start,iterations+1):
+        with instrument.phase('iteration', iteration=itr):
+            instrument.message("Iteration {} .... ".format(itr))
+            #===========================================================================
+                # Calculating the extra values for intersection part of in-links 
+            #===========================================================================
+            csr_extra = extra_values(result_, in_link_index, bin_adj if pruning else None) ## --- compressed sparse row representation of extra values matrix
+            previous_ = result_
+            if symmetric: ## -- only the upper-triangular tiles are computed
+                result_ = SymmetricMatrix(ds_size, block_size)
+                result_.add_sparse(alpha*csr_jaccard - (1.0-alpha)*csr_extra, decay_factor)
+                result_.add_congruence(previous_, blocks, decay_factor*(1.0-alpha))
+                result_.add_sparse(iden_matrix)
+            elif pruning: ## -- the rows of the next iterate are built and pruned block by block
+                result_q = result_ @ norm_csr_adj
+                result_, dropped = pruned_rows(lambda start, end: decay_factor*( alpha*csr_jaccard[start:end] + (1.0-alpha)*(norm_csr_adj_t[start:end] @ result_q - csr_extra[start:end]) ) + iden_matrix[start:end],
+                                               ds_size, prune_threshold, prune_top, block_size)
+                convergence.record_pruning(dropped, decay_factor*(1.0-alpha))
+            else:
+                result_ = decay_factor*( alpha*csr_jaccard + (1.0-alpha)*(norm_csr_adj.transpose() @ result_ @ norm_csr_adj - csr_extra) ) + iden_matrix
+            converged = convergence.update(previous_, result_)
+        instrument.count_iteration(itr, previous_, result_, norm_csr_adj)
+        checkpoint.save(itr, result_, convergence, structures)
+        if converged: ## -- the tolerance is reached
+            break
 
-            rows.append(tople_[1])        
-            cols.append(tople_[0])
-            vals.append(sum_/(float)(multi_))                
-                            
-        csr_extra = csr_matrix((vals, (rows, cols)), shape=(ds_size, ds_size)) ## --- compressed sparse row representation of extra values matrix
-        result_ = decay_factor*( alpha*csr_jaccard + (1.0-alpha)*(norm_csr_adj.transpose() @ result_ @ norm_csr_adj - csr_extra) ) + iden_matrix
+    #===========================================================================
+        # writing the topK results of each node in the output file
+    #===========================================================================
+    with instrument.phase('top_k'):
+        write_top_k(result_, topK, file_name, instrument=instrument)
+    return convergence.report()
 
 
 
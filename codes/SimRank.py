@@ -7,53 +7,188 @@ If you use this implementation of SimRank, please kindly cite the following pape
 Masoud Reyhani Hamedani and Sang-Wook Kim, On Investigating Both Effectiveness and Efficiency of Embedding Methods in Task of Similarity Computation of
 Nodes in Graphs. Applied Sciences, 11(1), 162, 2021, https://doi.org/10.3390/app11010162
 '''
-from scipy.sparse import csr_matrix
+import tempfile
+
+from scipy.sparse import identity
 from sklearn.preprocessing import normalize
 import numpy as np
 
-def simrank(graph='', iterations=0, topK=0):
+from checkpoint import Checkpoint
+from convergence import Convergence
+from graph_loader import as_adjacency
+from instrument import as_instrument, structures_nbytes
+from out_of_core import iterate_out_of_core, simrank_iteration
+from pruning import pruned_rows
+from symmetric import SymmetricMatrix, transposed_blocks
+from top_k import select_top_k, write_top_k
+
+def simrank_structures(graph='', instrument=None):
+    '''
+        :graph: a graph file as edgelist (a text file containing one edge per line), or an adjacency matrix loaded by load_graph
+        :instrument: an Instrument receiving the timers and counters of loading and precomputing (see instrument.py)
+        returns a dictionary of the structures that do not depend on parameters: the column normalized adjacency matrix
+    '''
+    #===========================================================================
+        # reading graph (the adjacency matrix is cached in a compressed binary file)
+    #===========================================================================
+    instrument = as_instrument(instrument)
+    with instrument.phase('load'):
+        csr_adj, ds_size = as_adjacency(graph) ## --- compressed sparse row representation of adjacency matrix
+    instrument.count('nodes', ds_size); instrument.count('edges', int(csr_adj.sum()))
+    instrument.message('The adjacency matrix is compressed in row format ...')
+    #===========================================================================
+        # column normalizing the sparse adjacency matrix (timed apart from loading)
+    #===========================================================================
+    with instrument.phase('precompute'):
+        norm_csr_adj = normalize(csr_adj, norm='l1', axis=0)
+    instrument.message('Column normalization is done ...')
+    return {'norm_csr_adj': norm_csr_adj}
+
+
+def simrank(graph='', iterations=0, topK=0, tolerance=0.0, norm='max', prune_threshold=None, prune_top=None, out_of_core=False, memory_budget=2**30, dtype=np.float64, work_dir=None, symmetric=False, block_size=None, file_name='result.txt', structures=None, checkpoint_file=None, checkpoint_every=1, resume_from=None, instrument=None, verbose=True):
     '''
         :graph: a graph file as edgelist (a text file containing one edge per line)
         :iteration: # of total iteration
         :topK: topK results to be written in an output file by descending order    
+        :tolerance: the iterations stop when the residual between two consecutive iterates is less than tolerance
+        :norm: the norm of residuals; 'max' (max-abs) or 'fro' (Frobenius)
+        :prune_threshold: if given, scores less than prune_threshold are dropped after each iteration and result_ is kept sparse
+        :prune_top: if given, only top prune_top scores of each row are kept after each iteration and result_ is kept sparse
+        :out_of_core: if True, the score matrices are kept in memory-mapped files and updated in blocks of rows
+        :memory_budget: # of bytes that blocks of rows may occupy in memory (out-of-core mode)
+        :dtype: data type of the score matrices (out-of-core mode); np.float32 halves the size of the files
+        :work_dir: the directory where the memory-mapped files are temporarily created (out-of-core mode)
+        :symmetric: if True, only the upper-triangular tiles of the score matrices are computed and stored (about half of the
+                    memory); the scores agree with the dense mode only up to rounding, so nodes whose scores are tied may be
+                    ordered differently in the topK results (see symmetric.py)
+        :block_size: # of rows (and columns) of tiles (symmetric mode), or # of rows built and pruned at once (pruning)
+        :file_name: the output file of topK results; its extension selects the format, e.g., ".txt", ".gz", or ".npz" (see sinks.py)
+        :structures: the structures returned by simrank_structures(graph); if given, graph is not read again
+        :checkpoint_file: if given, result_ is saved in this file every checkpoint_every iterations (and the structures once);
+                          in out-of-core mode, the memory-mapped result_ is streamed to a ".npy" file next to it
+        :checkpoint_every: # of iterations between two checkpoints
+        :resume_from: a checkpoint file; the iterations continue from its last saved iteration
+        :instrument: an Instrument (or a callback) receiving the timers and counters of the phases (see instrument.py)
+        :verbose: if False, the progress messages are not printed
+        returns a dictionary containing # of performed iterations, the residual and the elapsed time of each iteration
     '''
     decay_factor = 0.8
-    node_set = set ()
-    #===========================================================================
-        # reading graph
-        # NOTE: we can use networkX for reading the graph as well    
-    #===========================================================================            
-    rows = []; cols = []; sign = [];
-    with open(graph, "r") as f:
-        lines = f.readlines()
-        for line in lines:
-            # =================================================
-                # the value of cell (node_1,node_2) is set a 1.
-            # =================================================
-            edge = line.split('\t')
-            rows.append(int(edge[0]))
-            cols.append(int(edge[1]))
-            sign.append(float(1))
-            node_set.update((int(edge[0]),int(edge[1])))             
-        csr_adj = csr_matrix((sign, (rows, cols)), shape=(len(node_set), len(node_set))) ## --- compressed sparse row representation of adjacency matrix
-    f.close()
-    print ('The adjacency matrix is compressed in row format ...')
-    #===========================================================================
-        # column normalizing the sparse adjacency matrix
+    instrument = as_instrument(instrument, verbose, measure='SimRank')
+    pruning = prune_threshold is not None or prune_top is not None
     #===========================================================================
-    norm_csr_adj = normalize(csr_adj, norm='l1', axis=0)
-    print ('Column normalization is done ...')
+        # the arguments are checked before any structure is loaded or allocated
+    #===========================================================================
+    if symmetric and pruning:
+        raise ValueError('pruning is not supported in symmetric mode')
+    if out_of_core and pruning:
+        raise ValueError('pruning is not supported in out-of-core mode')
+    params = {'measure': 'SimRank', 'symmetric': symmetric, 'pruning': pruning, 'prune_threshold': prune_threshold, 'prune_top': prune_top,
+              'norm': norm, 'block_size': block_size if symmetric else None, ## -- the tiles of SymmetricMatrix (pruning blocks do not change scores)
+              'dtype': np.dtype(dtype).name if out_of_core else None} ## -- the data type of the memory-mapped score matrices
+    checkpoint = Checkpoint(checkpoint_file, checkpoint_every, params, instrument)
+    state = checkpoint.resume(resume_from) ## -- the state of the checkpoint to resume from (None if resume_from is not given)
+    if structures is None and state is not None:
+        structures = state['structures']
+    if structures is None:
+        structures = simrank_structures(graph, instrument)
+    instrument.count('structures_bytes', structures_nbytes(structures))
+    norm_csr_adj = structures['norm_csr_adj']
+    ds_size = norm_csr_adj.shape[0]
     
-    iden_matrix = np.identity(len(node_set),dtype=float)
+    convergence = Convergence(tolerance, norm, instrument)
+    start = 1
+    if state is not None: ## -- the iterations continue from the checkpoint
+        convergence.restore(state['report'])
+        start = iterations+1 if convergence.converged else state['iteration']+1
+    if out_of_core:
+        #===========================================================================
+            # the score matrices are kept in memory-mapped files of a temporary directory
+        #===========================================================================
+        instrument.message('===========================================================')
+        with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+            with instrument.phase('iterations'):
+                result_ = iterate_out_of_core(norm_csr_adj, iterations, decay_factor, simrank_iteration, tmp_dir, memory_budget, dtype, convergence, instrument.verbose,
+                                              checkpoint, structures, None if state is None else state['result_'], start)
+            with instrument.phase('top_k'):
+                write_top_k(result_, topK, file_name, instrument=instrument)
+            del result_ ## -- the memory-mapped files are closed before removing the directory
+        return convergence.report()
+
+    iden_matrix = identity(ds_size, dtype=float, format='csr') if pruning or symmetric else np.identity(ds_size,dtype=float) ## -- a sparse identity keeps result_ sparse (or small)
     iden_matrix = iden_matrix * (1-decay_factor)
-    result_ = iden_matrix ## S_0        
-    print('===========================================================')
+    result_ = SymmetricMatrix.identity(ds_size, 1-decay_factor, block_size) if symmetric else iden_matrix ## S_0
+    if state is not None: ## -- the iterations continue from the checkpoint
+        result_ = state['result_']
+    if symmetric:
+        blocks = transposed_blocks(norm_csr_adj, block_size)
+    if pruning:
+        norm_csr_adj_t = norm_csr_adj.transpose().tocsr() ## -- its rows are sliced by the blocks of pruned rows
+    instrument.message('===========================================================')
     
+    for itr in range (start,iterations+1):
+        with instrument.phase('iteration', iteration=itr):
+            instrument.message("Iteration {} .... ".format(itr))
+            previous_ = result_
+            if symmetric: ## -- only the upper-triangular tiles are computed
+                result_ = SymmetricMatrix(ds_size, block_size)
+                result_.add_congruence(previous_, blocks, decay_factor)
+                result_.add_diagonal(1-decay_factor)
+            elif pruning: ## -- the rows of Q^T·(S·Q) are built and pruned block by block
+                result_q = result_ @ norm_csr_adj
+                result_, dropped = pruned_rows(lambda start, end: decay_factor*(norm_csr_adj_t[start:end] @ result_q) + iden_matrix[start:end],
+                                               ds_size, prune_threshold, prune_top, block_size)
+                convergence.record_pruning(dropped, decay_factor)
+            else:
+                result_ = decay_factor*(norm_csr_adj.transpose() @ result_ @ norm_csr_adj) + iden_matrix
+            converged = convergence.update(previous_, result_)
+        instrument.count_iteration(itr, previous_, result_, norm_csr_adj)
+        checkpoint.save(itr, result_, convergence, structures)
+        if converged: ## -- the tolerance is reached
+            break
+
+    #===========================================================================
+        # writing the topK results of each node in the output file
+    #===========================================================================
+    with instrument.phase('top_k'):
+        write_top_k(result_, topK, file_name, instrument=instrument)
+    return convergence.report()
+
+
+def simrank_columns(norm_csr_adj, sources, iterations=0, decay_factor=0.8):
+    '''
+        :norm_csr_adj: the column normalized adjacency matrix (Q)
+        :sources: node ids of the source nodes
+        :iterations: # of total iteration
+        :decay_factor: the decay factor (C)
+        returns a matrix of size (#of nodes * #of sources) whose columns are the SimRank scores of the source nodes
+        NOTE:
+            The matrix form after k iterations is S_k=(1−C)·Σ_{t=0..k} C^t·(Q^T)^t·Q^t; hence, its columns are computed by
+            2k sparse matrix products with a thin dense matrix (Horner's rule) instead of the whole n*n matrix.
+    '''
+    ds_size = norm_csr_adj.shape[0]
+    sources = np.atleast_1d(np.asarray(sources, dtype=np.int64))
+    walks = [np.zeros((ds_size, len(sources)))] ## -- Q^t·[e_u1 ... e_um] for t=0..k
+    walks[0][sources, np.arange(len(sources))] = 1.0
     for itr in range (1,iterations+1):
-        print ("Iteration {} .... ".format(itr))
-        result_ = decay_factor*(norm_csr_adj.transpose() @ result_ @ norm_csr_adj) + iden_matrix
+        walks.append(norm_csr_adj @ walks[-1])
+    columns = walks[iterations]
+    for itr in range (iterations-1,-1,-1):
+        columns = decay_factor*(norm_csr_adj.transpose() @ columns) + walks[itr]
+    return (1-decay_factor)*columns
 
-    
-    
-    
-    
+
+def simrank_query(graph='', sources=(), iterations=0, topK=0):
+    '''
+        computes SimRank only for the given source nodes; the whole n*n matrix is never computed
+        :graph: a graph file as edgelist, or its adjacency matrix which is already loaded
+        :sources: node ids of the source nodes (or a single node id)
+        :iteration: # of total iteration
+        :topK: # of results returned for each source node
+        returns (source_nodes, nodes, values) arrays of the topK results of each source node by descending order
+    '''
+    decay_factor = 0.8
+    csr_adj = as_adjacency(graph)[0]
+    sources = np.atleast_1d(np.asarray(sources, dtype=np.int64)) ## -- a single source node is also accepted
+    norm_csr_adj = normalize(csr_adj, norm='l1', axis=0)
+    columns = simrank_columns(norm_csr_adj, sources, iterations, decay_factor)
+    return select_top_k(columns.T, sources, topK)
@@ -0,0 +1,250 @@
+'''
+Created on Oct 18, 2026
+benchmarks the measures and Cosine over the bundled datasets and synthetic graphs of increasing sizes
+
+Each run (a measure over a graph) is performed in a fresh process, so its peak resident set size (RSS) is not affected
+by the other runs. The phases of a run are timed separately:
+    load: reading the graph file into an adjacency matrix (without the cache)
+    precompute: computing the structures that do not depend on parameters (normalized adjacency matrices, Jaccard
+                matrices, and intersection indexes)
+    iterations: the elapsed time of each iteration, as reported by the measure
+    top_k: the rest of the measure after its iterations, i.e., selecting and writing the topK results
+The datasets do not ship representation vectors; hence, Cosine is run over random vectors (one per node of the graph)
+and its top_k phase includes the computation of the scores.
+The report is written as a JSON file (all fields and the environment, e.g., the git commit) and a CSV file (one row per
+run), and compare() lists the runs of a report that are slower than in a baseline report.
+
+Usage:
+    python benchmark.py --sizes 1000 2000 4000 --iterations 5 --report bench
+    python benchmark.py --datasets Wikipedia --sizes --report bench --compare baseline.json
+'''
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+import scipy
+
+from cosine_global import compute_cosine
+from graph_loader import load_graph
+from JacSim import JacSim_MF, jacsim_structures
+from JPRank import JPRank, jprank_structures
+from SimRank import simrank, simrank_structures
+from SimRank_star import simrank_star
+
+MEASURES = {
+    'SimRank': (simrank_structures, simrank, {}),
+    'SimRank*': (simrank_structures, simrank_star, {}),
+    'JacSim': (jacsim_structures, JacSim_MF, {'alpha': 0.4}),
+    'JPRank': (jprank_structures, JPRank, {'alpha_in': 0.4, 'alpha_out': 0.4, 'beta': 0.5}),
+    'Cosine': (None, compute_cosine, {}),
+} ## -- measure name -> (function computing the structures, function running the measure, default parameters)
+
+DATASETS_ZIP = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datasets', 'datasets.zip')
+
+CSV_FIELDS = ['dataset', 'measure', 'nodes', 'edges', 'load', 'precompute', 'iterations', 'iteration_mean', 'top_k', 'total', 'peak_rss_mb', 'skipped']
+
+
+def extract_datasets(work_dir, zip_file=DATASETS_ZIP):
+    '''
+        :work_dir: the directory where the datasets are extracted
+        :zip_file: the archive of the bundled datasets
+        returns a dictionary of dataset name -> graph file, e.g., {'Cora': 'work_dir/datasets/Cora/Cora.txt', ...}
+    '''
+    with zipfile.ZipFile(zip_file) as archive:
+        archive.extractall(work_dir)
+        names = archive.namelist()
+    graphs = {}
+    for name in names:
+        parts = name.split('/')
+        if len(parts) == 3 and parts[2].endswith('.txt') and not parts[2].startswith('NOTE'): ## -- datasets/<dataset>/<graph file>
+            graphs[parts[1]] = os.path.join(work_dir, *parts)
+    return dict(sorted(graphs.items()))
+
+
+def synthetic_graph(file_name, ds_size, avg_degree=10, seed=0):
+    '''
+        writes a random directed graph as edgelist whose out-degrees follow a power law
+        :file_name: the output graph file
+        :ds_size: # of nodes; each node has at least one edge so that all of them appear in the graph
+        :avg_degree: average # of out-links per node
+        returns file_name
+    '''
+    rng = np.random.default_rng(seed)
+    degrees = np.minimum(rng.zipf(2.0, ds_size), ds_size - 1)
+    degrees = np.maximum(1, np.round(degrees * avg_degree / degrees.mean())).astype(np.int64)
+    rows = np.repeat(np.arange(ds_size), degrees)
+    cols = rng.integers(0, ds_size, len(rows))
+    rows = np.concatenate((rows, np.arange(ds_size))); cols = np.concatenate((cols, (np.arange(ds_size) + 1) % ds_size)) ## -- a ring keeps every node in the graph
+    np.savetxt(file_name, np.column_stack((rows, cols)), fmt='%d', delimiter='\t')
+    return file_name
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError: ## -- e.g., on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10 ## -- bytes on macOS, kilobytes on Linux
+
+
+def _run(dataset, graph, measure, options):
+    '''
+        runs a measure over a graph and times its phases (performed in a fresh process)
+    '''
+    structures_function, measure_function, params = MEASURES[measure]
+    params = dict(params, **options.get('params', {}).get(measure, {}))
+    file_name = os.path.join(options['work_dir'], '{}_{}{}'.format(dataset, measure.replace('*', '_star'), options['extension']))
+    run = {'dataset': dataset, 'measure': measure}
+    with redirect_stdout(io.StringIO()): ## -- the progress messages of the measures are not a part of the report
+        start = time.perf_counter()
+        csr_adj, ds_size = load_graph(graph, use_cache=False)
+        run['load'] = time.perf_counter() - start
+        run['nodes'] = ds_size; run['edges'] = int(csr_adj.nnz)
+        if measure != 'Cosine' and ds_size > options['max_nodes']:
+            run['skipped'] = '# of nodes is more than max_nodes ({})'.format(options['max_nodes'])
+            return run
+
+        start = time.perf_counter()
+        if measure == 'Cosine':
+            graph_reps = np.random.default_rng(0).standard_normal((ds_size, options['dimensions']))
+        else:
+            structures = structures_function(csr_adj)
+        run['precompute'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if measure == 'Cosine':
+            compute_cosine(graph_reps, options['topK'], file_name=file_name, **params)
+            run['iterations'] = []
+        else:
+            report = measure_function(graph, iterations=options['iterations'], topK=options['topK'], file_name=file_name,
+                                      structures=structures, symmetric=options['symmetric'], **params)
+            run['iterations'] = report['times']
+        elapsed = time.perf_counter() - start
+    os.remove(file_name)
+    run['top_k'] = elapsed - sum(run['iterations'])
+    run['iteration_mean'] = float(np.mean(run['iterations'])) if run['iterations'] else None
+    run['total'] = run['load'] + run['precompute'] + elapsed
+    run['peak_rss_mb'] = _peak_rss_mb()
+    return run
+
+
+def _environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'python': platform.python_version(), 'numpy': np.__version__, 'scipy': scipy.__version__}
+
+
+def benchmark(datasets=None, sizes=(1000, 2000, 4000), measures=None, iterations=5, topK=30, avg_degree=10, dimensions=128,
+              symmetric=False, max_nodes=5000, extension='.txt', params=None, work_dir=None):
+    '''
+        :datasets: names of the bundled datasets to be benchmarked (e.g., ['Cora', 'Wikipedia']); None means all of them
+        :sizes: # of nodes of the synthetic graphs
+        :measures: names of the measures (see MEASURES); None means all of them
+        :iterations: # of iterations of the link-based measures
+        :topK: # of results written for each node
+        :avg_degree: average # of out-links per node in synthetic graphs
+        :dimensions: # of dimensions of the random representation vectors of Cosine
+        :symmetric: if True, the link-based measures are run in symmetric mode
+        :max_nodes: the link-based measures are skipped for larger graphs (their dense score matrices may not fit in memory)
+        :extension: the extension of the output files, which selects their format (see sinks.py)
+        :params: a dictionary of measure name -> parameters overriding the defaults, e.g., {'JacSim': {'alpha': 0.2}}
+        :work_dir: the directory of the extracted datasets, synthetic graphs, and output files; by default, a temporary one
+        returns the report, i.e., a dictionary of the environment, the options, and the runs
+    '''
+    measures = list(MEASURES) if measures is None else measures
+    options = {'iterations': iterations, 'topK': topK, 'dimensions': dimensions, 'symmetric': symmetric,
+               'max_nodes': max_nodes, 'extension': extension, 'params': params or {}}
+    report = {'environment': _environment(), 'options': dict(options, avg_degree=avg_degree), 'runs': []}
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        options['work_dir'] = tmp_dir
+        graphs = extract_datasets(tmp_dir) if datasets is None or len(datasets) else {}
+        graphs = {name: graph for name, graph in graphs.items() if datasets is None or name in datasets}
+        for ds_size in sizes:
+            graphs['synthetic_{}'.format(ds_size)] = synthetic_graph(os.path.join(tmp_dir, 'synthetic_{}.txt'.format(ds_size)), ds_size, avg_degree)
+        context = multiprocessing.get_context('spawn') ## -- a fresh process per run; its peak RSS is the one of the run
+        for dataset, graph in graphs.items():
+            for measure in measures:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    run = executor.submit(_run, dataset, graph, measure, options).result()
+                print ('{:<18} {:<9} {}'.format(dataset, measure, run.get('skipped') or '{:.3f} sec. (peak RSS {} MB)'.format(
+                    run['total'], None if run['peak_rss_mb'] is None else round(run['peak_rss_mb']))))
+                report['runs'].append(run)
+    return report
+
+
+def write_report(report, file_name='benchmark'):
+    '''
+        writes the report in "file_name.json" and its runs in "file_name.csv" (per-iteration times are joined by ';')
+    '''
+    with open(file_name + '.json', 'w') as json_file:
+        json.dump(report, json_file, indent=2)
+    with open(file_name + '.csv', 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for run in report['runs']:
+            row = dict(run)
+            row['iterations'] = ';'.join('{:.6f}'.format(value) for value in run.get('iterations', []))
+            writer.writerow(row)
+    print ('The report is written in {}.json and {}.csv ...'.format(file_name, file_name))
+
+
+def compare(baseline, report, threshold=0.1, phase='total'):
+    '''
+        :baseline, report: two reports (dictionaries or JSON files), e.g., of two commits
+        :threshold: a run is a regression if its phase is slower than in baseline by more than this ratio
+        :phase: 'load', 'precompute', 'iteration_mean', 'top_k', or 'total'
+        returns a list of (dataset, measure, baseline time, time, ratio) of the regressions
+    '''
+    if not isinstance(baseline, dict):
+        with open(baseline) as json_file:
+            baseline = json.load(json_file)
+    if not isinstance(report, dict):
+        with open(report) as json_file:
+            report = json.load(json_file)
+    previous = {(run['dataset'], run['measure']): run.get(phase) for run in baseline['runs']}
+    regressions = []
+    for run in report['runs']:
+        before = previous.get((run['dataset'], run['measure'])); after = run.get(phase)
+        if before and after is not None and after > before * (1 + threshold):
+            regressions.append((run['dataset'], run['measure'], before, after, after / before))
+    return regressions
+
+
+if __name__=='__main__':
+
+    parser = argparse.ArgumentParser(description='benchmarks the measures over the bundled datasets and synthetic graphs')
+    parser.add_argument('--datasets', nargs='*', default=None, help='bundled datasets (all of them by default; none if the option is empty)')
+    parser.add_argument('--sizes', nargs='*', type=int, default=[1000, 2000, 4000], help='# of nodes of synthetic graphs')
+    parser.add_argument('--measures', nargs='*', default=None, choices=list(MEASURES))
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--topK', type=int, default=30)
+    parser.add_argument('--symmetric', action='store_true')
+    parser.add_argument('--max-nodes', type=int, default=5000)
+    parser.add_argument('--report', default='benchmark', help='the report is written in REPORT.json and REPORT.csv')
+    parser.add_argument('--compare', default=None, help='a baseline report (JSON) to be compared with')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    report = benchmark(args.datasets, args.sizes, args.measures, args.iterations, args.topK,
+                       symmetric=args.symmetric, max_nodes=args.max_nodes)
+    write_report(report, args.report)
+    if args.compare is not None:
+        for dataset, measure, before, after, ratio in compare(args.compare, report, args.threshold):
+            print ('regression: {} {} {:.3f} -> {:.3f} sec. ({:.2f}x)'.format(dataset, measure, before, after, ratio))
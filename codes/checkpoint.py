@@ -0,0 +1,149 @@
+'''
+Created on Oct 18, 2026
+periodic checkpoints of the iterative computations so that a killed job resumes from its last saved iteration
+
+A checkpoint is an uncompressed ".npz" file keeping the score matrix (dense, sparse, or a SymmetricMatrix), the # of
+performed iterations, the residuals and timings so far, and the parameters of the measure. The structures that do not
+depend on the iterations (Jaccard matrices, intersection indexes, normalized adjacency matrices) are written once per
+run in a separate ".structures.npz" file next to the checkpoint, so resuming does not compute them again.
+In out-of-core mode, the memory-mapped score matrix is streamed to its own ".npy" file named by the iteration (e.g.,
+"run.scores_3.npy") and memory-mapped again when resuming, so it is never loaded in memory as a whole; the file of the
+previous checkpoint is only removed once the new checkpoint file is in place.
+Files are written to a temporary file first and then renamed, so a job killed while writing keeps the last checkpoint.
+'''
+import json
+import os
+
+import numpy as np
+
+from instrument import as_instrument
+from structures import pack, unpack
+
+
+def structures_file(file_name):
+    '''
+        returns the file keeping the structures of a checkpoint file, e.g., "run.structures.npz" for "run.npz"
+    '''
+    return os.path.splitext(file_name)[0] + '.structures.npz'
+
+
+def scores_file(file_name, iteration):
+    '''
+        returns the file keeping the memory-mapped score matrix of a checkpoint, e.g., "run.scores_3.npy" for "run.npz"
+    '''
+    return os.path.splitext(file_name)[0] + '.scores_{}.npy'.format(iteration)
+
+
+def _save_scores(file_name, result_):
+    '''
+        streams a memory-mapped matrix to file_name (np.save writes it by tofile, without a copy in memory)
+    '''
+    tmp_file = file_name + '.tmp'
+    with open(tmp_file, 'wb') as tmp:
+        np.save(tmp, result_)
+    os.replace(tmp_file, file_name)
+
+
+def _remove_old_scores(file_name, current=None):
+    '''
+        removes the score files of the previous checkpoints of file_name except current
+    '''
+    directory = os.path.dirname(os.path.abspath(file_name))
+    prefix = os.path.basename(os.path.splitext(file_name)[0]) + '.scores_'
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith('.npy') and (current is None or name != os.path.basename(current)):
+            os.remove(os.path.join(directory, name))
+
+
+def _save(file_name, arrays):
+    tmp_file = file_name + '.tmp'
+    with open(tmp_file, 'wb') as tmp:
+        np.savez(tmp, **arrays)
+    os.replace(tmp_file, file_name)
+
+
+def save_checkpoint(file_name, iteration, result_, report, params, structures=None):
+    '''
+        :file_name: the checkpoint file
+        :iteration: # of performed iterations
+        :result_: the score matrix after iteration (a np.memmap is saved in scores_file(file_name, iteration))
+        :report: the report of Convergence after iteration
+        :params: a dictionary of the measure name and its parameters (checked when resuming)
+        :structures: if given, the structures are also written in structures_file(file_name)
+    '''
+    if structures is not None:
+        arrays, layout = pack(structures)
+        _save(structures_file(file_name), dict(arrays, layout=json.dumps(layout)))
+    current = None
+    if isinstance(result_, np.memmap): ## -- out-of-core mode
+        current = scores_file(file_name, iteration)
+        _save_scores(current, result_)
+        arrays, layout = {'result_': np.array(os.path.basename(current))}, {'result_': ('scores',)}
+    else:
+        arrays, layout = pack({'result_': result_})
+    _save(file_name, dict(arrays, layout=json.dumps(layout), iteration=iteration, report=json.dumps(report), params=json.dumps(params)))
+    _remove_old_scores(file_name, current)
+
+
+def load_checkpoint(file_name, params=None):
+    '''
+        :file_name: a checkpoint file
+        :params: if given, the parameters which the checkpoint must have been written with
+        returns a dictionary of iteration, result_, report, params, and structures (None if they were not saved); the
+        score matrix of an out-of-core checkpoint is a read-only np.memmap
+    '''
+    with np.load(file_name) as checkpoint:
+        arrays = dict(checkpoint)
+    saved_params = json.loads(str(arrays['params']))
+    if params is not None and saved_params != json.loads(json.dumps(params)):
+        raise ValueError('the checkpoint {} was written with different parameters: {}'.format(file_name, saved_params))
+    layout = json.loads(str(arrays['layout']))
+    if layout['result_'][0] == 'scores':
+        result_ = np.load(os.path.join(os.path.dirname(os.path.abspath(file_name)), str(arrays['result_'])), mmap_mode='r')
+    else:
+        result_ = unpack(arrays, layout)['result_']
+    state = {'iteration': int(arrays['iteration']), 'result_': result_,
+             'report': json.loads(str(arrays['report'])), 'params': saved_params, 'structures': None}
+    if os.path.exists(structures_file(file_name)):
+        with np.load(structures_file(file_name)) as saved:
+            arrays = dict(saved)
+        state['structures'] = unpack(arrays, json.loads(str(arrays['layout'])))
+    return state
+
+
+class Checkpoint:
+    '''
+        saves a checkpoint every few iterations and loads the checkpoint to resume from
+        :file_name: the checkpoint file; None disables checkpoints
+        :every: a checkpoint is saved after every "every" iterations
+        :params: a dictionary of the measure name and its parameters
+        :instrument: an Instrument printing the progress messages if it is verbose
+    '''
+    def __init__(self, file_name=None, every=1, params=None, instrument=None):
+        self.file_name = file_name
+        self.every = max(1, every)
+        self.params = params or {}
+        self.instrument = as_instrument(instrument)
+        self._structures_saved = False
+
+    def resume(self, resume_from):
+        '''
+            returns the state of the checkpoint resume_from (see load_checkpoint), or None if resume_from is None
+        '''
+        if resume_from is None:
+            return None
+        state = load_checkpoint(resume_from, self.params)
+        self.instrument.message('Resuming from iteration {} of {} ...'.format(state['iteration'], resume_from))
+        if self.file_name is not None and state['structures'] is not None:
+            self._structures_saved = os.path.abspath(structures_file(resume_from)) == os.path.abspath(structures_file(self.file_name))
+        return state
+
+    def save(self, iteration, result_, convergence, structures):
+        '''
+            saves a checkpoint if iteration is a multiple of every; the structures are only saved once
+        '''
+        if self.file_name is None or iteration % self.every:
+            return
+        save_checkpoint(self.file_name, iteration, result_, convergence.report(), self.params, None if self._structures_saved else structures)
+        self._structures_saved = True
+        self.instrument.message('    checkpoint of iteration {} is saved in {}'.format(iteration, self.file_name))
@@ -0,0 +1,109 @@
+'''
+Created on Oct 18, 2026
+convergence check of the iterative computations (early stopping) and per-iteration residuals and timings
+
+The residual of an iteration is the max-abs ('max') or Frobenius ('fro') norm of the difference between two
+consecutive iterates; it is computed in blocks of rows, so no n*n temporary matrix is allocated. The residuals and the
+error bounds of pruning are also emitted as counters of an Instrument (see instrument.py).
+'''
+import time
+
+from scipy.sparse import issparse
+import numpy as np
+
+from instrument import as_instrument
+from symmetric import SymmetricMatrix
+
+
+def residual(previous, current, norm='max', block_size=None):
+    '''
+        :previous, current: two consecutive iterates (dense, memory-mapped, or sparse matrices, or SymmetricMatrix objects)
+        :norm: 'max' for max-abs norm or 'fro' for Frobenius norm of current-previous
+        :block_size: # of rows processed at once; by default, about 2^22 values per block
+        returns the norm of current-previous
+    '''
+    if norm not in ('max', 'fro'):
+        raise ValueError("norm should be either 'max' or 'fro'")
+    if isinstance(current, SymmetricMatrix) and current.same_tiles(previous):
+        return current.difference_norm(previous, norm)
+    if issparse(previous) or issparse(current):
+        diff = abs(current - previous)
+        if norm == 'max':
+            return float(diff.max()) if diff.nnz else 0.0
+        return float(np.sqrt(diff.multiply(diff).sum()))
+    ds_size = current.shape[0]
+    if block_size is None:
+        block_size = max(1, 2**22 // max(1, current.shape[1]))
+    value = 0.0
+    for start in range(0, ds_size, block_size):
+        end = min(start + block_size, ds_size)
+        diff = np.asarray(current[start:end]) - np.asarray(previous[start:end])
+        if norm == 'max':
+            value = max(value, float(np.abs(diff).max()) if diff.size else 0.0)
+        else:
+            value += float(np.einsum('ij,ij->', diff, diff))
+    return value if norm == 'max' else float(np.sqrt(value))
+
+
+class Convergence:
+    '''
+        keeps the residuals and the elapsed times of iterations; stops the iterations when the residual falls below tolerance
+        :tolerance: the iterations stop when the residual is less than tolerance (0 means all iterations are performed)
+        :norm: 'max' or 'fro'
+        :instrument: an Instrument receiving the residuals and error bounds (and printing them if it is verbose)
+    '''
+    def __init__(self, tolerance=0.0, norm='max', instrument=None):
+        if norm not in ('max', 'fro'):
+            raise ValueError("norm should be either 'max' or 'fro'")
+        self.tolerance = tolerance
+        self.norm = norm
+        self.instrument = as_instrument(instrument)
+        self.residuals = []
+        self.times = []
+        self.error_bounds = []
+        self.converged = False
+        self._start = time.perf_counter()
+
+    def update(self, previous, current):
+        '''
+            records the residual and the elapsed time of the iteration which is just finished
+            returns True if the residual is less than tolerance
+        '''
+        self.residuals.append(residual(previous, current, self.norm))
+        now = time.perf_counter()
+        self.times.append(now - self._start)
+        self._start = now
+        self.instrument.count('residual', self.residuals[-1], iteration=len(self.residuals), norm=self.norm)
+        self.instrument.message('    residual ({} norm): {:.6e} .... {:.3f} sec.'.format(self.norm, self.residuals[-1], self.times[-1]))
+        self.converged = self.residuals[-1] < self.tolerance
+        return self.converged
+
+    def record_pruning(self, dropped, contraction):
+        '''
+            records the error bound of pruned scores after the iteration which is just finished
+            :dropped: the largest dropped score in this iteration
+            :contraction: the factor of the measure that scales the error of the previous scores
+        '''
+        previous = self.error_bounds[-1] if self.error_bounds else 0.0
+        self.error_bounds.append(contraction*previous + dropped)
+        self.instrument.count('dropped', dropped, iteration=len(self.error_bounds))
+        self.instrument.count('error_bound', self.error_bounds[-1], iteration=len(self.error_bounds))
+        self.instrument.message('    pruning: largest dropped score {:.6e}, error bound {:.6e}'.format(dropped, self.error_bounds[-1]))
+
+    def restore(self, report):
+        '''
+            continues the history of a report (e.g., of a checkpoint) whose iterations are already performed
+        '''
+        self.residuals = list(report['residuals'])
+        self.times = list(report['times'])
+        self.error_bounds = list(report['error_bounds'])
+        self.converged = report['converged']
+
+    def report(self):
+        '''
+            returns a dictionary containing # of performed iterations, whether the tolerance is reached,
+            the residual and the elapsed time (in seconds) of each iteration, and the error bounds of pruned scores
+        '''
+        return {'iterations': len(self.residuals), 'converged': self.converged, 'tolerance': self.tolerance,
+                'norm': self.norm, 'residuals': list(self.residuals), 'times': list(self.times),
+                'error_bounds': list(self.error_bounds)}
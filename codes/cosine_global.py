@@ -7,42 +7,149 @@ If you use this vectorized implementation of Cosine, please kindly cite its orig
 Masoud Reyhani Hamedani and Sang-Wook Kim, On Investigating Both Effectiveness and Efficiency of Embedding Methods in Task of Similarity Computation of
 Nodes in Graphs. Applied Sciences, 11(1), 162, 2021, https://doi.org/10.3390/app11010162
 '''
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
 import numpy as np
 
-def compute_cosine(graph_reps='', topK=''):
+from cosine_index import CosineIndex
+from instrument import as_instrument
+from top_k import select_top_k, write_blocks
+
+_worker_reps = {} ## -- the representation matrix and its norms in each worker process
+
+
+def _duplicated_columns(graph_reps, graph_reps_norm):
+    '''
+        returns (duplicates, firsts) where duplicates are the nodes whose vector is shared by a node of a smaller id and
+        firsts are those first nodes (None if all vectors are distinct); only the nodes whose norm is (nearly) equal to
+        the one of another node are compared, so np.unique never sorts the whole matrix of distinct vectors
+    '''
+    order = np.argsort(graph_reps_norm, kind='stable')
+    sorted_norms = graph_reps_norm[order]
+    same = np.isclose(sorted_norms[1:], sorted_norms[:-1], rtol=1e-12, atol=0) ## -- a shared vector has the same norm up to rounding
+    if not same.any():
+        return None
+    candidates = np.sort(order[np.concatenate(([False], same)) | np.concatenate((same, [False]))])
+    distinct, first, inverse = np.unique(graph_reps[candidates], axis=0, return_index=True, return_inverse=True)
+    if len(distinct) == len(candidates):
+        return None
+    firsts = candidates[first][inverse.ravel()]
+    duplicated = firsts != candidates
+    return candidates[duplicated], firsts[duplicated]
+
+
+def _cosine_scores(row_reps, row_norms, graph_reps, graph_reps_norm, columns):
+    '''
+        returns Cosine between the nodes of row_reps and all nodes by a single matrix multiplication; the scores of the
+        duplicated columns are overwritten in place by the ones of their first nodes, so the nodes having the same
+        vector are tied exactly
+    '''
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sim_values_all = row_reps.dot(graph_reps.T)
+        sim_values_all /= row_norms[:, None] ## -- the tile is divided in place (no n*block tile of norms)
+        sim_values_all /= graph_reps_norm
+    if columns is not None:
+        duplicates, firsts = columns
+        sim_values_all[:, duplicates] = sim_values_all[:, firsts]
+    return sim_values_all
+
+
+def _cosine_block(graph_reps, graph_reps_norm, columns, topK, bounds):
+    '''
+        computes Cosine between the nodes of a block of rows and all nodes and returns their topK results (the nodes
+        having the same vector are ordered by node id)
+    '''
+    start, end = bounds
+    return select_top_k(_cosine_scores(graph_reps[start:end], graph_reps_norm[start:end], graph_reps, graph_reps_norm, columns), np.arange(start, end), topK)
+
+
+def cosine_rows(graph_reps, nodes, topK, block_size=None):
+    '''
+        :graph_reps: a matrix of size (#of nodes * #of dimensions) contains the representation vectors for all nodes
+        :nodes: node ids of the target nodes
+        :topK: # of results kept for each target node
+        :block_size: # of target nodes processed at once; by default, about 2^24 scores are kept in memory per block
+        returns the (target_nodes, nodes, values) arrays of the target nodes, exactly as compute_cosine computes them
+        (e.g., the reference results of a sample of nodes for CosineIndex.recall)
+    '''
+    graph_reps = np.asarray(graph_reps)
+    graph_reps_norm = np.linalg.norm(graph_reps, axis=1)
+    columns = _duplicated_columns(graph_reps, graph_reps_norm)
+    nodes = np.atleast_1d(np.asarray(nodes, dtype=np.int64))
+    if block_size is None:
+        block_size = max(1, 2**24 // max(1, len(graph_reps)))
+    blocks = []
+    for start in range(0, len(nodes), block_size):
+        targets = nodes[start:start+block_size]
+        blocks.append(select_top_k(_cosine_scores(graph_reps[targets], graph_reps_norm[targets], graph_reps, graph_reps_norm, columns), targets, topK))
+    if not blocks:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    return tuple(np.concatenate(column) for column in zip(*blocks))
+
+
+def _init_worker(graph_reps, graph_reps_norm, columns):
+    _worker_reps['graph_reps'] = graph_reps
+    _worker_reps['graph_reps_norm'] = graph_reps_norm
+    _worker_reps['columns'] = columns
+
+
+def _cosine_block_worker(topK, bounds):
+    return _cosine_block(_worker_reps['graph_reps'], _worker_reps['graph_reps_norm'], _worker_reps['columns'], topK, bounds)
+
+
+def compute_cosine(graph_reps='', topK='', block_size=None, workers=1, use_processes=False, file_name='result.txt', output_format=None, instrument=None, index=None, n_probe=None, verbose=True):
     '''
         :graph_reps: a matrix of size (#of nodes * #of dimensions) contains the representation vectors for all nodes
         :topK: topK results to be written in an output file by descending order
+        :block_size: # of target nodes whose similarity scores are computed by a single matrix multiplication;
+                     by default, about 2^24 scores are kept in memory per block
+        :workers: # of threads (or processes) computing the blocks
+        :use_processes: if True, the blocks are distributed over a process pool instead of a thread pool
+        :file_name: the output file (its extension selects the format, see sinks.py) or a sink object
+        :output_format: 'csv', 'csv.gz', 'npz', or 'npy'; by default, it is selected by the extension of file_name
+        :instrument: an Instrument (or a callback) receiving the timers and counters of the phases (see instrument.py)
+        :index: if given, a CosineIndex (or its file) finding the topK results approximately instead of scanning all
+                node pairs (see cosine_index.py); graph_reps is not used
+        :n_probe: # of lists scanned per query by index (the recall-vs-speed knob); by default, the one of index
+        :verbose: if False, the progress message is not printed
         NOTE: 
-            Ignore 'RuntimeWarning: invalid value encountered in true_divide' message; it happens when the representation vector of a node contains only '0'.
-            This problem is handled during writing the results in the dictionary.            
+            When the representation vector of a node contains only '0', its Cosine values are NaN;
+            NaN and '0' values are not written in the output file.
+            Ties are broken by node id (the first node is kept). The nodes having identical vectors get
+            identical scores; other ties (e.g., vectors which are multiples of each other) are exact only up to the
+            rounding of the matrix multiplication, so their order may differ in the last bit of their scores.
     '''
-        
-    result_dict = {}    
-    graph_reps_norm = np.linalg.norm(graph_reps, axis=1)
-    
-    for row in range (0, len(graph_reps)):
-        sim_values={} # dictionary to keep similarity scores between the target node and other nodes (key:node, value:score)
-        target_node = graph_reps[row]
-        dot_product = graph_reps.dot(target_node)
-        target_node_norm = np.linalg.norm(target_node)        
-        norms_multiply = np.multiply(graph_reps_norm, target_node_norm)        
-        sim_values_all = np.divide(dot_product, norms_multiply)
-        
-        for node in range (0, len(sim_values_all)):
-            if node != row and sim_values_all[node]!=0 and not np.isnan(sim_values_all[node]):
-                sim_values[node] = sim_values_all[node]
-        sim_values = sorted (sim_values.items(), key=lambda x:x[1],reverse=True)
-        if len(sim_values) > topK: ## --- keeping the topK results  
-            sim_values = sim_values[:topK]            
-        result_dict[row] = sim_values        
-        
-    sim_file = open ("result.txt",'w')
-    for target_node in result_dict:
-        for node in result_dict[target_node]:
-            sim_file.write(str(target_node)+','+str(node[0])+','+str(round(node[1],5))+'\n')
-    print ('The result is written in the file...')
-    sim_file.close()
+    instrument = as_instrument(instrument, verbose, measure='Cosine')
+    if index is not None:
+        if not isinstance(index, CosineIndex):
+            index = CosineIndex.load(index)
+        instrument.count('nodes', index.ds_size); instrument.count('lists', index.n_lists)
+        with instrument.phase('top_k'):
+            write_blocks(index.query_blocks(np.arange(index.ds_size), topK, n_probe, block_size), file_name, output_format, instrument)
+        return
+
+    with instrument.phase('precompute'):
+        graph_reps = np.asarray(graph_reps)
+        graph_reps_norm = np.linalg.norm(graph_reps, axis=1)
+        columns = _duplicated_columns(graph_reps, graph_reps_norm)
+    ds_size = len(graph_reps)
+    if block_size is None:
+        block_size = max(1, 2**24 // max(1, ds_size))
+    blocks = [(start, min(start + block_size, ds_size)) for start in range(0, ds_size, block_size)]
+    instrument.count('nodes', ds_size); instrument.count('blocks', len(blocks))
+    instrument.count('flops', 2 * ds_size * ds_size * graph_reps.shape[1])
+    instrument.count('bytes', 2 * min(block_size, ds_size) * ds_size * graph_reps.itemsize) ## -- the scores of a block and their copy in select_top_k
+
+    with instrument.phase('top_k'):
+        if workers <= 1:
+            write_blocks(map(partial(_cosine_block, graph_reps, graph_reps_norm, columns, topK), blocks), file_name, output_format, instrument)
+        elif use_processes:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graph_reps, graph_reps_norm, columns)) as executor:
+                write_blocks(executor.map(partial(_cosine_block_worker, topK), blocks), file_name, output_format, instrument)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                write_blocks(executor.map(partial(_cosine_block, graph_reps, graph_reps_norm, columns, topK), blocks), file_name, output_format, instrument)
             
             
 if __name__=='__main__':
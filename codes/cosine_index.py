@@ -0,0 +1,264 @@
+'''
+Created on Oct 18, 2026
+an approximate nearest-neighbor index answering the topK Cosine queries of nodes without scanning all node pairs
+
+The representation vectors are normalized and clustered by spherical k-means into n_lists inverted lists (IVF); each
+node is kept in the list of its closest centroid. A query only scans the n_probe lists whose centroids are the closest
+to its vector, so n_probe is the knob between recall and speed (n_probe=n_lists scans all nodes). The index is built
+once, can be saved in (and loaded from) an ".npz" file, and answers the queries of any subset of nodes; recall() reports
+the fraction of the topK results of compute_cosine which are found by the index.
+The vectors keep the data type of graph_reps unless dtype is given (np.float32 halves the memory of the index); the
+scores of the index are dot products of normalized vectors, so they may differ from the ones of compute_cosine in the
+last bits (and the order of near ties may differ).
+The results have the same format as the ones of compute_cosine (the target node itself, '0' and NaN scores are not
+reported), so they can be written by the sinks or given to evaluate.
+'''
+import time
+
+from scipy.sparse import csr_matrix
+import numpy as np
+
+from sinks import read_results
+from top_k import select_top_k, select_top_k_sparse
+
+
+def _normalized(graph_reps, dtype=None):
+    '''
+        returns the rows of graph_reps divided by their norms (as dtype; by default, a floating type of graph_reps);
+        zero rows stay zero
+    '''
+    graph_reps = np.asarray(graph_reps)
+    graph_reps = graph_reps.astype(dtype or np.result_type(graph_reps.dtype, np.float32), copy=False)
+    norms = np.linalg.norm(graph_reps, axis=1)
+    norms[norms == 0] = 1.0
+    return graph_reps / norms[:, None]
+
+
+def _closest(vectors, centroids, block_size=2**14):
+    '''
+        returns the index of the closest centroid (the largest dot product) of each vector
+    '''
+    closest = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_size):
+        closest[start:start+block_size] = np.argmax(vectors[start:start+block_size] @ centroids.T, axis=1)
+    return closest
+
+
+def spherical_kmeans(vectors, n_clusters, n_iter=10, seed=0):
+    '''
+        :vectors: normalized vectors (rows)
+        :n_clusters: # of clusters
+        :n_iter: # of iterations of assigning vectors and updating centroids
+        returns the normalized centroids (rows)
+    '''
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        closest = _closest(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, closest, vectors)
+        empty = np.bincount(closest, minlength=n_clusters) == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)] ## -- empty clusters restart from random vectors
+        centroids = _normalized(sums)
+    return centroids
+
+
+class CosineIndex:
+    '''
+        :n_lists: # of inverted lists; by default, about 4*sqrt(#of nodes)
+        :n_probe: # of lists scanned per query (the default of query)
+        :n_iter: # of iterations of k-means
+        :sample_size: # of vectors which the centroids are trained on (all vectors if there are fewer)
+        :seed: the seed of sampling and initializing centroids
+        :dtype: data type of the stored vectors; by default, the one of graph_reps (e.g., np.float32 halves the memory)
+    '''
+    def __init__(self, n_lists=None, n_probe=8, n_iter=10, sample_size=2**16, seed=0, dtype=None):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.sample_size = sample_size
+        self.seed = seed
+        self.dtype = dtype
+        self.centroids = None
+        self.vectors = None ## -- normalized vectors sorted by list
+        self.ids = None ## -- node id of each row of vectors
+        self.offsets = None ## -- the rows of list l are vectors[offsets[l]:offsets[l+1]]
+        self.positions = None ## -- the row of vectors of each node id
+
+    @property
+    def ds_size(self):
+        return len(self.ids)
+
+    def build(self, graph_reps):
+        '''
+            :graph_reps: a matrix of size (#of nodes * #of dimensions) contains the representation vectors for all nodes
+            returns the index itself
+        '''
+        vectors = _normalized(graph_reps, self.dtype)
+        ds_size = len(vectors)
+        n_lists = self.n_lists or int(round(4 * np.sqrt(ds_size)))
+        self.n_lists = n_lists = max(1, min(n_lists, ds_size))
+        rng = np.random.default_rng(self.seed)
+        sample = vectors if ds_size <= self.sample_size else vectors[rng.choice(ds_size, self.sample_size, replace=False)]
+        self.centroids = spherical_kmeans(sample, min(n_lists, len(sample)), self.n_iter, self.seed)
+        closest = _closest(vectors, self.centroids)
+        order = np.argsort(closest, kind='stable')
+        self._set(self.centroids, vectors[order], order, np.r_[0, np.cumsum(np.bincount(closest, minlength=len(self.centroids)))])
+        return self
+
+    def _set(self, centroids, vectors, ids, offsets):
+        self.centroids = centroids; self.vectors = vectors; self.ids = np.asarray(ids, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64); self.n_lists = len(centroids)
+        self.positions = np.empty(len(self.ids), dtype=np.int64)
+        self.positions[self.ids] = np.arange(len(self.ids))
+
+    def save(self, file_name):
+        '''
+            saves the index in file_name (an uncompressed ".npz" file)
+        '''
+        with open(file_name, 'wb') as index_file:
+            np.savez(index_file, centroids=self.centroids, vectors=self.vectors, ids=self.ids, offsets=self.offsets,
+                     params=np.array([self.n_probe, self.n_iter, self.sample_size, self.seed], dtype=np.int64))
+
+    @classmethod
+    def load(cls, file_name):
+        '''
+            returns the index saved in file_name
+        '''
+        with np.load(file_name) as saved:
+            n_probe, n_iter, sample_size, seed = saved['params'].tolist()
+            index = cls(len(saved['centroids']), n_probe, n_iter, sample_size, seed, saved['vectors'].dtype)
+            index._set(saved['centroids'], saved['vectors'], saved['ids'], saved['offsets'])
+        return index
+
+    def query_blocks(self, nodes, topK, n_probe=None, block_size=None):
+        '''
+            :nodes: node ids of the target nodes
+            :topK: # of results kept for each target node
+            :n_probe: # of lists scanned per query; more lists give higher recall and slower queries
+            :block_size: # of target nodes processed at once; by default, about 2^22 candidate scores are kept per block
+            yields (target_nodes, nodes, values) for each block of target nodes
+        '''
+        nodes = np.asarray(nodes, dtype=np.int64)
+        n_probe = max(1, min(n_probe or self.n_probe, self.n_lists))
+        if block_size is None:
+            block_size = max(1, 2**22 // max(1, n_probe * self.ds_size // self.n_lists))
+        if n_probe == self.n_lists: ## -- all lists are scanned; the exact scan is faster
+            yield from self._exact_blocks(nodes, topK)
+            return
+        sizes = np.diff(self.offsets)
+        for start in range(0, len(nodes), block_size):
+            targets = nodes[start:start+block_size]
+            queries = self.vectors[self.positions[targets]]
+            #===========================================================================
+                # the closest n_probe lists of each query; each probed list is scanned once by all of its queries
+            #===========================================================================
+            centroid_scores = queries @ self.centroids.T
+            probes = np.argpartition(-centroid_scores, n_probe - 1, axis=1)[:, :n_probe]
+            query_rows = np.repeat(np.arange(len(queries)), probes.shape[1]); probed = probes.ravel()
+            order = np.argsort(probed, kind='stable')
+            query_rows = query_rows[order]; probed = probed[order]
+            bounds = np.r_[0, np.flatnonzero(np.diff(probed)) + 1, len(probed)]
+            rows = []; cols = []; values = []
+            for first, last in zip(bounds[:-1], bounds[1:]):
+                inverted_list = probed[first]
+                if sizes[inverted_list] == 0:
+                    continue
+                members = slice(self.offsets[inverted_list], self.offsets[inverted_list+1])
+                scores = queries[query_rows[first:last]] @ self.vectors[members].T
+                rows.append(np.repeat(query_rows[first:last], scores.shape[1]))
+                cols.append(np.tile(self.ids[members], last - first))
+                values.append(scores.ravel())
+            candidates = csr_matrix((np.concatenate(values) if values else np.zeros(0, dtype=self.vectors.dtype),
+                                     (np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64),
+                                      np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64))),
+                                    shape=(len(queries), self.ds_size))
+            yield select_top_k_sparse(candidates, targets, topK)
+
+    def query(self, nodes, topK, n_probe=None, block_size=None):
+        '''
+            the same as query_blocks; returns the (target_nodes, nodes, values) arrays of all target nodes
+        '''
+        return _concatenate(self.query_blocks(nodes, topK, n_probe, block_size))
+
+    def _exact_blocks(self, nodes, topK, block_size=None):
+        nodes = np.asarray(nodes, dtype=np.int64)
+        if block_size is None:
+            block_size = max(1, 2**24 // max(1, self.ds_size))
+        for start in range(0, len(nodes), block_size):
+            targets = nodes[start:start+block_size]
+            scores = np.empty((len(targets), self.ds_size), dtype=self.vectors.dtype)
+            scores[:, self.ids] = self.vectors[self.positions[targets]] @ self.vectors.T
+            yield select_top_k(scores, targets, topK)
+
+    def exact(self, nodes, topK, block_size=None):
+        '''
+            returns the (target_nodes, nodes, values) arrays of the target nodes by scanning all vectors of the index
+            (see cosine_rows for the results of compute_cosine)
+        '''
+        return _concatenate(self._exact_blocks(nodes, topK, block_size))
+
+    def recall(self, nodes, topK, n_probe=None, exact=None, graph_reps=None):
+        '''
+            :nodes: node ids of the target nodes (e.g., a random sample of nodes)
+            :exact: the results of compute_cosine as (target_nodes, nodes, values) arrays, a MemorySink, or an output
+                    file; only the results of nodes are used
+            :graph_reps: if exact is not given, the representation vectors; the results of nodes are computed by
+                         cosine_rows, exactly as compute_cosine does
+            returns a dictionary of recall (the fraction of the topK results of compute_cosine found by the index), the
+            elapsed times of the approximate and the exact queries (None if exact is given), and n_probe
+        '''
+        nodes = np.asarray(nodes, dtype=np.int64)
+        start = time.perf_counter()
+        approximate = self.query(nodes, topK, n_probe)
+        approximate_time = time.perf_counter() - start
+        exact_time = None
+        if exact is None:
+            if graph_reps is None:
+                raise ValueError('either the results of compute_cosine (exact) or graph_reps should be given')
+            from cosine_global import cosine_rows ## -- cosine_global imports this module
+            start = time.perf_counter()
+            exact = cosine_rows(graph_reps, nodes, topK)
+            exact_time = time.perf_counter() - start
+        elif hasattr(exact, 'arrays'):
+            exact = exact.arrays()
+        elif isinstance(exact, str):
+            exact = read_results(exact)
+        target_nodes, result_nodes = np.asarray(exact[0], dtype=np.int64), np.asarray(exact[1], dtype=np.int64)
+        sampled = np.isin(target_nodes, nodes)
+        found = np.isin(target_nodes[sampled] * self.ds_size + result_nodes[sampled], approximate[0] * self.ds_size + approximate[1])
+        return {'recall': float(found.mean()) if len(found) else 1.0, 'n_probe': max(1, min(n_probe or self.n_probe, self.n_lists)),
+                'query_time': approximate_time, 'exact_time': exact_time}
+
+
+def _concatenate(blocks):
+    blocks = list(blocks)
+    if not blocks:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    return tuple(np.concatenate(column) for column in zip(*blocks))
+
+
+def build_index(graph_reps, file_name=None, **params):
+    '''
+        :graph_reps: a matrix of size (#of nodes * #of dimensions) contains the representation vectors for all nodes
+        :file_name: if given, the index is saved in this file
+        :params: the parameters of CosineIndex, e.g., n_lists=1024, n_probe=16
+        returns the built CosineIndex
+    '''
+    index = CosineIndex(**params).build(graph_reps)
+    if file_name is not None:
+        index.save(file_name)
+    return index
+
+
+if __name__=='__main__':
+
+    from cosine_global import cosine_rows
+    rng = np.random.default_rng(0)
+    graph_reps = rng.standard_normal((200, 128))[rng.integers(0, 200, 20000)] + 0.5*rng.standard_normal((20000, 128)) ## -- clustered vectors, like embeddings
+    index = build_index(graph_reps, 'cosine_index.npz', n_probe=8)
+    sample = np.random.default_rng(1).choice(len(graph_reps), 500, replace=False)
+    print (index.recall(sample, 30, 1, graph_reps=graph_reps))
+    exact = cosine_rows(graph_reps, sample, 30) ## -- the results of compute_cosine are computed once for all n_probe
+    for n_probe in (4, 16, 64):
+        print (index.recall(sample, 30, n_probe, exact))
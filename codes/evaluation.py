@@ -0,0 +1,171 @@
+'''
+Created on Oct 18, 2026
+evaluates the topK results of similarity computation against the ground truth labels of a dataset
+
+The "ground_truth" folder of a dataset has a text file per label where each line is a node id; the files are loaded
+once into a sparse (#of nodes * #of labels) indicator matrix. A result node is relevant to a target node if they have
+at least one label in common, and the relevant nodes of a target node are all other nodes sharing a label with it.
+precision@K, recall@K, nDCG@K, and MAP@K are computed for all target nodes at once from the (target_nodes, nodes,
+values) arrays of the results, e.g., those kept by a MemorySink given to compute_cosine or a link-based measure
+as file_name, or those read from an output file by read_results.
+'''
+import os
+import sys
+
+from scipy.sparse import csr_matrix
+import numpy as np
+
+from sinks import read_results
+
+
+class GroundTruth:
+    '''
+        :labels: a sparse (#of nodes * #of labels) indicator matrix
+        :names: the label names (the names of the label files)
+    '''
+    def __init__(self, labels, names=None):
+        self.labels = csr_matrix(labels, dtype=np.float64)
+        self.names = list(names) if names is not None else [str(label) for label in range(self.labels.shape[1])]
+        self._relevant_counts = None
+
+    @property
+    def ds_size(self):
+        return self.labels.shape[0]
+
+    def relevant_counts(self, block_size=None):
+        '''
+            :block_size: # of nodes processed at once; by default, about 2^24 node pairs are kept in memory per block
+            returns # of relevant nodes of each node, i.e., # of other nodes sharing a label with it (computed once)
+        '''
+        if self._relevant_counts is None:
+            if block_size is None:
+                block_size = max(1, 2**24 // max(1, self.ds_size))
+            labels_t = self.labels.transpose().tocsc()
+            counts = np.zeros(self.ds_size, dtype=np.int64)
+            has_label = np.diff(self.labels.indptr) > 0
+            for start in range(0, self.ds_size, block_size):
+                end = min(start + block_size, self.ds_size)
+                counts[start:end] = np.diff((self.labels[start:end] @ labels_t).indptr)
+            self._relevant_counts = counts - has_label ## -- a node sharing a label with itself is not counted
+        return self._relevant_counts
+
+    def relevant(self, target_nodes, nodes):
+        '''
+            returns a boolean array; item i is True if target_nodes[i] and nodes[i] have a label in common
+        '''
+        shared = self.labels[target_nodes].multiply(self.labels[nodes])
+        return np.asarray(shared.sum(axis=1)).ravel() > 0
+
+
+def load_ground_truth(ground_truth_dir, ds_size=None):
+    '''
+        :ground_truth_dir: the "ground_truth" folder of a dataset (one text file per label, one node id per line)
+        :ds_size: # of nodes of the graph; by default, the largest node id in the label files plus one
+        returns a GroundTruth whose labels are ordered by the names of their files
+    '''
+    names = sorted(name for name in os.listdir(ground_truth_dir) if not name.startswith('.'))
+    nodes = []; labels = []
+    for label, name in enumerate(names):
+        members = np.loadtxt(os.path.join(ground_truth_dir, name), dtype=np.int64, ndmin=1)
+        nodes.append(members); labels.append(np.full(len(members), label, dtype=np.int64))
+    nodes = np.concatenate(nodes) if nodes else np.zeros(0, dtype=np.int64)
+    labels = np.concatenate(labels) if labels else np.zeros(0, dtype=np.int64)
+    if ds_size is None:
+        ds_size = int(nodes.max()) + 1 if len(nodes) else 0
+    indicator = csr_matrix((np.ones(len(nodes)), (nodes, labels)), shape=(ds_size, len(names)))
+    indicator.sum_duplicates()
+    indicator.data[:] = 1.0
+    return GroundTruth(indicator, [os.path.splitext(name)[0] for name in names])
+
+
+def _ranked(target_nodes, nodes, values, exclude_self):
+    '''
+        sorts the results of each target node by descending order of values (ties are broken by node id) and
+        returns (target_nodes, nodes, ranks) where ranks start from 0 for each target node
+    '''
+    target_nodes = np.asarray(target_nodes, dtype=np.int64); nodes = np.asarray(nodes, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if exclude_self:
+        keep = target_nodes != nodes
+        target_nodes = target_nodes[keep]; nodes = nodes[keep]; values = values[keep]
+    order = np.lexsort((nodes, -values, target_nodes))
+    target_nodes = target_nodes[order]; nodes = nodes[order]
+    starts = np.flatnonzero(np.r_[True, target_nodes[1:] != target_nodes[:-1]]) if len(target_nodes) else np.zeros(0, dtype=np.int64)
+    counts = np.diff(np.r_[starts, len(target_nodes)])
+    ranks = np.arange(len(target_nodes)) - np.repeat(starts, counts)
+    return target_nodes, nodes, ranks
+
+
+def evaluate(results, ground_truth, topK=None, targets=None, exclude_self=True, per_target=False):
+    '''
+        :results: (target_nodes, nodes, values) arrays, a MemorySink, or an output file (see read_results)
+        :ground_truth: a GroundTruth (see load_ground_truth) or the "ground_truth" folder of the dataset
+        :topK: a K or a list of Ks; by default, the largest # of results of a target node
+        :targets: the evaluated target nodes; by default, all nodes having at least one relevant node
+        :exclude_self: if True, a target node is removed from its own results
+        :per_target: if True, the scores of each target node are also returned
+        returns a dictionary of 'precision@K', 'recall@K', 'ndcg@K', and 'map@K' (averaged over targets) for each K,
+        and '# of targets'; with per_target, also the arrays of the scores of targets (in the order of 'targets')
+        NOTE:
+            A target node without results (or with fewer than K results) gets no credit for the missing ones;
+            MAP@K normalizes the average precision by min(K, # of relevant nodes).
+    '''
+    if not isinstance(ground_truth, GroundTruth):
+        ground_truth = load_ground_truth(ground_truth)
+    if hasattr(results, 'arrays'):
+        results = results.arrays()
+    elif isinstance(results, str):
+        results = read_results(results)
+    target_nodes, nodes, ranks = _ranked(*results, exclude_self)
+    inside = (target_nodes < ground_truth.ds_size) & (nodes < ground_truth.ds_size) ## -- nodes without labels beyond the label files
+    relevant = np.zeros(len(nodes), dtype=bool)
+    relevant[inside] = ground_truth.relevant(target_nodes[inside], nodes[inside])
+    targets = None if targets is None else np.atleast_1d(np.asarray(targets, dtype=np.int64))
+    n_nodes = max(ground_truth.ds_size, int(target_nodes.max()) + 1 if len(target_nodes) else 0,
+                  int(targets.max()) + 1 if targets is not None and len(targets) else 0) ## -- e.g., explicit targets without labels at the end of the ids
+    relevant_counts = np.zeros(n_nodes, dtype=np.int64)
+    relevant_counts[:ground_truth.ds_size] = ground_truth.relevant_counts()
+    if targets is None:
+        targets = np.flatnonzero(relevant_counts > 0)
+    if topK is None:
+        topK = int(ranks.max()) + 1 if len(ranks) else 1
+    Ks = [topK] if np.isscalar(topK) else list(topK)
+
+    #===========================================================================
+        # the hits and their cumulative # within each target node give all scores by a few bincounts
+    #===========================================================================
+    minlength = len(relevant_counts)
+    discounts = 1.0 / np.log2(np.arange(max(Ks)) + 2.0)
+    ideal = np.r_[0.0, np.cumsum(discounts)] ## -- ideal[k] is the DCG of k relevant nodes at the top
+    hits = relevant.astype(np.float64)
+    starts = np.flatnonzero(ranks == 0)
+    cum_hits = np.cumsum(hits)
+    cum_hits -= np.repeat(cum_hits[starts] - hits[starts], np.diff(np.r_[starts, len(ranks)])) ## -- # of hits up to each rank of its target node
+    report = {'# of targets': len(targets)}
+    for K in Ks:
+        top = ranks < K
+        n_relevant = relevant_counts[targets]
+        n_hits = np.bincount(target_nodes[top], weights=hits[top], minlength=minlength)[targets]
+        dcg = np.bincount(target_nodes[top], weights=hits[top] * discounts[ranks[top]], minlength=minlength)[targets]
+        average_precision = np.bincount(target_nodes[top], weights=hits[top] * cum_hits[top] / (ranks[top] + 1.0), minlength=minlength)[targets]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scores = {'precision@{}'.format(K): n_hits / K,
+                      'recall@{}'.format(K): np.where(n_relevant > 0, n_hits / n_relevant, 0.0),
+                      'ndcg@{}'.format(K): np.where(n_relevant > 0, dcg / ideal[np.minimum(n_relevant, K)], 0.0),
+                      'map@{}'.format(K): np.where(n_relevant > 0, average_precision / np.minimum(n_relevant, K), 0.0)}
+        for name, values in scores.items():
+            report[name] = float(values.mean()) if len(values) else 0.0
+            if per_target:
+                report[name + ' (per target)'] = values
+    if per_target:
+        report['targets'] = targets
+    return report
+
+
+if __name__=='__main__':
+
+    if len(sys.argv) < 3:
+        sys.exit('usage: python evaluation.py <result file> <ground_truth folder of the extracted dataset> [K ...]')
+    report = evaluate(sys.argv[1], sys.argv[2], topK=[int(K) for K in sys.argv[3:]] or [10, 20, 30])
+    for name, value in report.items():
+        print ('{}: {}'.format(name, value))
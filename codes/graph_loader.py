@@ -0,0 +1,113 @@
+'''
+Created on Oct 18, 2026
+reads a graph file (edge list format) into a compressed sparse row adjacency matrix
+
+The edge list is parsed by numpy in bulk and the adjacency matrix is cached in a compressed ".npz" file; the cache is
+keyed by the path, size, and modification time of the graph file, so it is rebuilt whenever the graph file changes.
+The cache is written to a temporary file first and then renamed, and a cache which cannot be read (e.g., truncated by a
+killed job) is parsed again and rewritten.
+'''
+import hashlib
+import os
+import tempfile
+import zipfile
+
+from scipy.sparse import csr_matrix, issparse
+import numpy as np
+
+
+def _cache_file(graph, cache_dir):
+    '''
+        returns the path of the cache file of a graph file
+    '''
+    if cache_dir is None:
+        return graph + '.npz'
+    path_hash = hashlib.md5(os.path.abspath(graph).encode('utf-8')).hexdigest()[:10]
+    return os.path.join(cache_dir, os.path.basename(graph) + '.' + path_hash + '.npz')
+
+
+def _cache_key(graph):
+    stat = os.stat(graph)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _read_cache(cache_file, graph, key):
+    '''
+        returns (csr_adj, ds_size) kept in cache_file, or None if it is missing, stale, or unreadable
+    '''
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        with np.load(cache_file) as cache:
+            if not (np.array_equal(cache['key'], key) and str(cache['path']) == os.path.abspath(graph)):
+                return None
+            ds_size = int(cache['ds_size'])
+            return csr_matrix((cache['data'], cache['indices'], cache['indptr']), shape=(ds_size, ds_size)), ds_size
+    except (zipfile.BadZipFile, KeyError, ValueError, OSError, EOFError): ## -- e.g., a cache truncated by a killed job
+        return None
+
+
+def _write_cache(cache_file, graph, key, csr_adj, ds_size):
+    '''
+        writes the cache in a temporary file of the same directory and renames it, so concurrent runs and killed jobs
+        never leave a partial cache file
+    '''
+    try:
+        handle, tmp_file = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(os.path.abspath(cache_file)))
+    except OSError: ## -- e.g., a read-only directory; the graph is simply parsed again next time
+        return
+    try:
+        with os.fdopen(handle, 'wb') as tmp:
+            np.savez_compressed(tmp, key=key, path=os.path.abspath(graph), ds_size=ds_size,
+                                data=csr_adj.data, indices=csr_adj.indices, indptr=csr_adj.indptr)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def read_edges(graph):
+    '''
+        :graph: a graph file as edgelist (a text file containing one edge per line; tab is used as the separator)
+        returns (rows, cols) as int32 arrays; edge i is rows[i] -> cols[i]
+    '''
+    edges = np.loadtxt(graph, dtype=np.int32, delimiter='\t', usecols=(0, 1), ndmin=2)
+    return edges[:, 0].copy(), edges[:, 1].copy()
+
+
+def load_graph(graph='', use_cache=True, cache_dir=None):
+    '''
+        :graph: a graph file as edgelist (a text file containing one edge per line; tab is used as the separator)
+        :use_cache: if True, the adjacency matrix is read from (or saved in) a compressed cache file
+        :cache_dir: the directory of cache files; by default, the cache is stored next to the graph file
+        returns (csr_adj, ds_size)
+            :csr_adj: compressed sparse row representation of adjacency matrix; the value of cell (node_1,node_2) is
+                      the # of edges node_1 -> node_2
+            :ds_size: # of nodes
+    '''
+    cache_file = _cache_file(graph, cache_dir)
+    key = _cache_key(graph)
+    if use_cache:
+        cached = _read_cache(cache_file, graph, key)
+        if cached is not None:
+            return cached
+
+    rows, cols = read_edges(graph)
+    ds_size = len(np.unique(np.concatenate((rows, cols)))) ## -- # of distinct nodes appearing in the graph
+    csr_adj = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(ds_size, ds_size))
+    csr_adj.sum_duplicates()
+
+    if use_cache:
+        _write_cache(cache_file, graph, key, csr_adj, ds_size)
+    return csr_adj, ds_size
+
+
+def as_adjacency(graph):
+    '''
+        :graph: a graph file as edgelist, or an adjacency matrix which is already loaded (e.g., by load_graph)
+        returns (csr_adj, ds_size)
+    '''
+    if issparse(graph):
+        csr_adj = csr_matrix(graph)
+        return csr_adj, csr_adj.shape[0]
+    return load_graph(graph)
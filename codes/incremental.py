@@ -0,0 +1,286 @@
+'''
+Created on Oct 18, 2026
+incremental maintenance of SimRank, SimRank*, JacSim, and JPRank scores when a few edges are added or removed
+
+Each measure is an affine map S -> T(S) = L(S) + K whose scores are its fixed point. When edges change, the map becomes
+T'; if S=T(S), the new scores are S+D where D is the fixed point of D -> T'(S)-T(S) + L'(D). Both parts are local:
+    T'(S)-T(S) only has non-zero cells in the rows and the columns of the nodes whose in-link (out-link) sets changed,
+        e.g., Q'^T·S·Q'-Q^T·S·Q = Δ^T·S·Q'+Q^T·S·Δ where Δ=Q'-Q only has the columns of those nodes;
+        the Jaccard Coefficients and the extra values are only computed again for the node pairs of those nodes.
+    L'(D) is computed by sparse products of the sparse matrix D (and extra_values_sparse for JacSim and JPRank),
+        so D spreads one hop per iteration from the changed nodes.
+Therefore, an update costs time proportional to the neighborhood of the changed edges instead of a full recomputation.
+The given scores are taken as converged ones; the error of the update is of the order of C^iterations. Dense matrices
+and SymmetricMatrix objects are updated in place, so a copy should be given if the old scores are still needed.
+'''
+from scipy.sparse import csr_matrix, issparse
+from sklearn.preprocessing import normalize
+import numpy as np
+
+from checkpoint import load_checkpoint
+from jaccard import binary_adjacency, extra_rows, extra_values_sparse, jaccard_rows, update_intersection_index
+from symmetric import SymmetricMatrix
+
+
+def _edges(edges):
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    return edges[:, 0], edges[:, 1]
+
+
+def apply_edges(csr_adj, added=(), removed=()):
+    '''
+        :csr_adj: a sparse adjacency matrix; the value of cell (node_1,node_2) is the # of edges node_1 -> node_2
+        :added: edges (node_1,node_2) to be added
+        :removed: edges (node_1,node_2) to be removed
+        returns the adjacency matrix after the edges are added and removed
+    '''
+    ds_size = csr_adj.shape[0]
+    rows, cols = _edges(added)
+    del_rows, del_cols = _edges(removed)
+    if np.any(np.concatenate((rows, cols, del_rows, del_cols)) >= ds_size):
+        raise ValueError('node ids must be less than # of nodes; new nodes cannot be added incrementally')
+    delta = csr_matrix((np.concatenate((np.ones(len(rows)), -np.ones(len(del_rows)))),
+                        (np.concatenate((rows, del_rows)), np.concatenate((cols, del_cols)))), shape=csr_adj.shape)
+    new_adj = csr_matrix(csr_adj + delta)
+    if new_adj.nnz and new_adj.data.min() < 0:
+        raise ValueError('removed edges must exist in the graph')
+    new_adj.eliminate_zeros()
+    return new_adj
+
+
+def _scores(result_):
+    '''
+        returns the score matrix of a checkpoint file, or result_ itself if it is already a matrix
+    '''
+    if not isinstance(result_, str):
+        return result_
+    result_ = load_checkpoint(result_)['result_']
+    return np.array(result_) if isinstance(result_, np.memmap) else result_ ## -- the scores of an out-of-core checkpoint are read-only
+
+
+def _columns(result_, cols):
+    '''
+        returns the columns cols of result_ as a dense matrix
+    '''
+    if isinstance(result_, SymmetricMatrix):
+        ds_size = result_.shape[0]
+        return result_.gather(np.tile(np.arange(ds_size), len(cols)), np.repeat(cols, ds_size)).reshape(len(cols), ds_size).T
+    if issparse(result_):
+        return csr_matrix(result_)[:, cols].toarray()
+    return np.asarray(result_[:, cols])
+
+
+def _in_columns(values, cols, ds_size):
+    '''
+        returns the sparse n*n matrix whose columns cols are the columns of values (the other columns are zero)
+    '''
+    matrix = csr_matrix((values.ravel(), (np.repeat(np.arange(ds_size), len(cols)), np.tile(cols, ds_size))), shape=(ds_size, ds_size))
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def _changes(result_, norm_csr_adj, new_norm_csr_adj, nodes):
+    '''
+        returns result_·Δ restricted to the columns nodes where Δ=Q'-Q
+    '''
+    delta = csr_matrix(new_norm_csr_adj - norm_csr_adj).tocsc()[:, nodes]
+    delta.eliminate_zeros()
+    rows = np.unique(delta.indices)
+    if len(rows) == 0:
+        return np.zeros((norm_csr_adj.shape[0], len(nodes)))
+    return _columns(result_, rows) @ delta[rows].toarray()
+
+
+def congruence_change(result_, norm_csr_adj, new_norm_csr_adj, nodes):
+    '''
+        returns Q'^T·result_·Q' - Q^T·result_·Q = Δ^T·result_·Q' + Q^T·result_·Δ as a sparse matrix
+        :nodes: the columns where Q and Q' differ
+    '''
+    ds_size = norm_csr_adj.shape[0]
+    product = _changes(result_, norm_csr_adj, new_norm_csr_adj, nodes)
+    change = _in_columns(norm_csr_adj.transpose() @ product, nodes, ds_size)
+    return change + _in_columns(new_norm_csr_adj.transpose() @ product, nodes, ds_size).transpose()
+
+
+def star_change(result_, norm_csr_adj, new_norm_csr_adj, nodes):
+    '''
+        returns (Q'^T·result_ + result_·Q') - (Q^T·result_ + result_·Q) = Δ^T·result_ + result_·Δ as a sparse matrix
+    '''
+    ds_size = norm_csr_adj.shape[0]
+    change = _in_columns(_changes(result_, norm_csr_adj, new_norm_csr_adj, nodes), nodes, ds_size)
+    return change + change.transpose()
+
+
+def _propagate(result_, constant, linear, iterations, threshold, verbose):
+    '''
+        D_1=constant, D_(k+1)=constant+linear(D_k); returns result_+D_iterations (dense and symmetric matrices are
+        updated in place)
+    '''
+    delta = csr_matrix(constant)
+    for itr in range (2,iterations+1):
+        delta = csr_matrix(constant + linear(delta))
+        if threshold:
+            delta.data[np.abs(delta.data) < threshold] = 0.0
+        delta.eliminate_zeros()
+    if verbose:
+        print ('The scores of {} node pairs are updated ...'.format(delta.nnz))
+    if isinstance(result_, SymmetricMatrix):
+        result_.add_sparse(delta)
+        return result_
+    if issparse(result_):
+        return csr_matrix(result_ + delta)
+    delta = delta.tocoo()
+    result_[delta.row, delta.col] += delta.data
+    return result_
+
+
+def _check_iterations(iterations):
+    if iterations < 1:
+        raise ValueError('iterations should be at least 1; the first iteration applies the changes of the edges')
+
+
+def _changed_nodes(added, removed):
+    '''
+        returns (targets, sources) of the added and removed edges, i.e., the nodes whose in-link (out-link) sets changed
+    '''
+    edges = np.concatenate((np.asarray(added, dtype=np.int64).reshape(-1, 2), np.asarray(removed, dtype=np.int64).reshape(-1, 2)))
+    return np.unique(edges[:, 1]), np.unique(edges[:, 0])
+
+
+def update_simrank(result_, csr_adj, added=(), removed=(), iterations=5, threshold=0.0, structures=None, verbose=True):
+    '''
+        :result_: the SimRank scores of the graph csr_adj (dense, sparse, a SymmetricMatrix, or a checkpoint file)
+                  (a dense matrix or a SymmetricMatrix is updated in place and returned; a sparse matrix is copied)
+        :csr_adj: the adjacency matrix before the edges are added or removed
+        :added: edges (node_1,node_2) to be added
+        :removed: edges (node_1,node_2) to be removed
+        :iterations: # of iterations propagating the changes (at least 1; the first one applies the local changes); the
+                     truncation error is about C^iterations times the magnitude of the change of the scores, i.e., about
+                     0.8^5≈0.33 of it with the default 5 iterations (e.g., 20 iterations give 0.8^20≈0.01)
+        :threshold: changes less than threshold are dropped after each iteration (keeps the changes local)
+        :verbose: if False, the progress message is not printed
+        :structures: the structures returned by simrank_structures; if given, they are updated as well
+        returns (result_, csr_adj, structures) after the edges are added and removed
+    '''
+    _check_iterations(iterations)
+    decay_factor = 0.8
+    result_ = _scores(result_)
+    new_adj = apply_edges(csr_adj, added, removed)
+    targets = _changed_nodes(added, removed)[0]
+    norm_csr_adj = normalize(csr_adj, norm='l1', axis=0)
+    new_norm = normalize(new_adj, norm='l1', axis=0)
+    constant = decay_factor * congruence_change(result_, norm_csr_adj, new_norm, targets)
+    result_ = _propagate(result_, constant, lambda delta: decay_factor*(new_norm.transpose() @ delta @ new_norm), iterations, threshold, verbose)
+    return result_, new_adj, None if structures is None else {'norm_csr_adj': new_norm}
+
+
+def update_simrank_star(result_, csr_adj, added=(), removed=(), iterations=5, threshold=0.0, structures=None, verbose=True):
+    '''
+        the same as update_simrank for SimRank* scores (a dense matrix or a SymmetricMatrix is updated in place)
+    '''
+    _check_iterations(iterations)
+    decay_factor = 0.8
+    result_ = _scores(result_)
+    new_adj = apply_edges(csr_adj, added, removed)
+    targets = _changed_nodes(added, removed)[0]
+    norm_csr_adj = normalize(csr_adj, norm='l1', axis=0)
+    new_norm = normalize(new_adj, norm='l1', axis=0)
+    constant = (decay_factor/2.0) * star_change(result_, norm_csr_adj, new_norm, targets)
+    result_ = _propagate(result_, constant, lambda delta: (decay_factor/2.0)*(new_norm.transpose() @ delta + delta @ new_norm), iterations, threshold, verbose)
+    return result_, new_adj, None if structures is None else {'norm_csr_adj': new_norm}
+
+
+def _jacsim_terms(result_, csr_adj, new_adj, alpha, nodes):
+    '''
+        returns (constant, linear, new_bin_adj, new_norm) of the JacSim map over in-links of csr_adj (without C);
+        nodes are the nodes whose in-link sets changed
+    '''
+    bin_adj = binary_adjacency(csr_adj)
+    new_bin_adj = binary_adjacency(new_adj)
+    norm_csr_adj = normalize(csr_adj, norm='l1', axis=0)
+    new_norm = normalize(new_adj, norm='l1', axis=0)
+    jaccard_change = jaccard_rows(new_bin_adj, nodes) - jaccard_rows(bin_adj, nodes)
+    extra_change = extra_rows(result_, new_bin_adj, nodes) - extra_rows(result_, bin_adj, nodes)
+    constant = alpha*jaccard_change + (1.0-alpha)*(congruence_change(result_, norm_csr_adj, new_norm, nodes) - extra_change)
+    linear = lambda delta: (1.0-alpha)*(new_norm.transpose() @ delta @ new_norm - extra_values_sparse(delta, new_bin_adj))
+    return constant, linear, new_bin_adj, new_norm
+
+
+def _replace_rows(csr_jaccard, new_bin_adj, nodes):
+    '''
+        returns the Jaccard matrix where the node pairs of nodes are computed again
+    '''
+    jaccard = csr_matrix(csr_jaccard).tocoo()
+    in_nodes = np.zeros(jaccard.shape[0], dtype=bool); in_nodes[nodes] = True
+    keep = ~(in_nodes[jaccard.row] | in_nodes[jaccard.col])
+    kept = csr_matrix((jaccard.data[keep], (jaccard.row[keep], jaccard.col[keep])), shape=jaccard.shape)
+    return kept + jaccard_rows(new_bin_adj, nodes)
+
+
+def update_jacsim(result_, csr_adj, alpha=0.0, added=(), removed=(), iterations=5, threshold=0.0, structures=None, verbose=True):
+    '''
+        :result_: the JacSim scores of the graph csr_adj (dense, sparse, a SymmetricMatrix, or a checkpoint file)
+                  (a dense matrix or a SymmetricMatrix is updated in place and returned; a sparse matrix is copied)
+        :csr_adj: the adjacency matrix before the edges are added or removed
+        :alpha: value of parameter alpha
+        :added: edges (node_1,node_2) to be added
+        :removed: edges (node_1,node_2) to be removed
+        :iterations: # of iterations propagating the changes (at least 1; the first one applies the local changes); the
+                     truncation error is about C^iterations times the magnitude of the change of the scores, i.e., about
+                     0.8^5≈0.33 of it with the default 5 iterations (e.g., 20 iterations give 0.8^20≈0.01)
+        :threshold: changes less than threshold are dropped after each iteration (keeps the changes local)
+        :verbose: if False, the progress message is not printed
+        :structures: the structures returned by jacsim_structures; if given, their Jaccard matrix and intersection index
+                     are updated only for the node pairs of the changed nodes
+        returns (result_, csr_adj, structures) after the edges are added and removed
+    '''
+    _check_iterations(iterations)
+    decay_factor = 0.8
+    result_ = _scores(result_)
+    new_adj = apply_edges(csr_adj, added, removed)
+    targets = _changed_nodes(added, removed)[0]
+    constant, linear, new_bin_adj, new_norm = _jacsim_terms(result_, csr_adj, new_adj, alpha, targets)
+    result_ = _propagate(result_, decay_factor*constant, lambda delta: decay_factor*linear(delta), iterations, threshold, verbose)
+    if structures is not None:
+        structures = {'csr_jaccard': _replace_rows(structures['csr_jaccard'], new_bin_adj, targets),
+                      'in_link_index': update_intersection_index(structures['in_link_index'], new_bin_adj, targets),
+                      'norm_csr_adj': new_norm}
+    return result_, new_adj, structures
+
+
+def update_jprank(result_, csr_adj, alpha_in=0.0, alpha_out=0.0, beta=0.0, added=(), removed=(), iterations=5, threshold=0.0, structures=None, verbose=True):
+    '''
+        :result_: the JPRank scores of the graph csr_adj (dense, sparse, a SymmetricMatrix, or a checkpoint file)
+                  (a dense matrix or a SymmetricMatrix is updated in place and returned; a sparse matrix is copied)
+        :csr_adj: the (in-links) adjacency matrix before the edges are added or removed
+        :alpha_in: value of parameter alpha for in-links
+        :alpha_out: value of parameter alpha for out-links
+        :beta: value of parameter beta
+        :added: edges (node_1,node_2) to be added
+        :removed: edges (node_1,node_2) to be removed
+        :iterations: # of iterations propagating the changes (at least 1; the first one applies the local changes); the
+                     truncation error is about C^iterations times the magnitude of the change of the scores, i.e., about
+                     0.8^5≈0.33 of it with the default 5 iterations (e.g., 20 iterations give 0.8^20≈0.01)
+        :threshold: changes less than threshold are dropped after each iteration (keeps the changes local)
+        :verbose: if False, the progress message is not printed
+        :structures: the structures returned by jprank_structures; if given, their Jaccard matrices and intersection
+                     indexes are updated only for the node pairs of the changed nodes
+        returns (result_, csr_adj, structures) after the edges are added and removed
+    '''
+    _check_iterations(iterations)
+    decay_factor = 0.8
+    result_ = _scores(result_)
+    new_adj = apply_edges(csr_adj, added, removed)
+    targets, sources = _changed_nodes(added, removed) ## -- in-link sets of targets and out-link sets of sources changed
+    constant_in, linear_in, new_bin_in, new_norm_in = _jacsim_terms(result_, csr_adj, new_adj, alpha_in, targets)
+    constant_out, linear_out, new_bin_out, new_norm_out = _jacsim_terms(result_, csr_adj.transpose().tocsr(), new_adj.transpose().tocsr(), alpha_out, sources)
+    constant = beta*decay_factor*constant_in + (1.0-beta)*decay_factor*constant_out
+    linear = lambda delta: beta*decay_factor*linear_in(delta) + (1.0-beta)*decay_factor*linear_out(delta)
+    result_ = _propagate(result_, constant, linear, iterations, threshold, verbose)
+    if structures is not None:
+        structures = {'csr_jaccard_in': _replace_rows(structures['csr_jaccard_in'], new_bin_in, targets),
+                      'csr_jaccard_out': _replace_rows(structures['csr_jaccard_out'], new_bin_out, sources),
+                      'in_link_index': update_intersection_index(structures['in_link_index'], new_bin_in, targets),
+                      'out_link_index': update_intersection_index(structures['out_link_index'], new_bin_out, sources),
+                      'norm_csr_adj_in': new_norm_in, 'norm_csr_adj_out': new_norm_out}
+    return result_, new_adj, structures
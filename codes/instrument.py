@@ -0,0 +1,185 @@
+'''
+Created on Oct 18, 2026
+timers and counters of the phases of the measures, reported to a callback or a structured log
+
+An Instrument emits events, i.e., dictionaries such as
+    {'event': 'phase', 'measure': 'JacSim', 'phase': 'iteration', 'iteration': 3, 'seconds': 1.25}
+    {'event': 'counter', 'measure': 'JacSim', 'name': 'jaccard_nnz', 'value': 183406}
+to a user-supplied callback and/or a log file (one JSON object per line). The phases are load, precompute (the
+structures computed after loading), iteration, iterations (out-of-core mode), and top_k; the counters are edges (parsed
+edges), nodes, jaccard_nnz, intersection_pairs, intersection_members, structures_bytes, and, per iteration, nnz, flops,
+bytes (allocated by the iterate), residual, and, with pruning, dropped (the largest dropped score) and error_bound;
+Cosine reports nodes, blocks, flops, and bytes (allocated per block).
+A single phase can also be profiled: with profile='cprofile', its event keeps the top functions by cumulative time
+(and the statistics are dumped in profile_file if given); with profile='tracemalloc', it keeps the current and peak
+bytes traced during the phase and its top allocating lines.
+Without a callback and a log file, an Instrument emits nothing. The progress messages of the measures (e.g., residuals)
+are also printed through the Instrument, only if it is verbose.
+'''
+from contextlib import contextmanager
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+
+from scipy.sparse import issparse
+import numpy as np
+
+from structures import pack
+from symmetric import SymmetricMatrix
+
+
+def nnz(matrix):
+    '''
+        returns # of stored values of a dense, sparse, or SymmetricMatrix score matrix
+    '''
+    if issparse(matrix):
+        return int(matrix.nnz)
+    if isinstance(matrix, SymmetricMatrix):
+        return int(matrix.data.size)
+    return int(np.prod(matrix.shape))
+
+
+def nbytes(matrix):
+    '''
+        returns # of bytes of a dense, sparse, or SymmetricMatrix score matrix
+    '''
+    if issparse(matrix):
+        return int(sum(getattr(matrix, name).nbytes for name in ('data', 'indices', 'indptr') if hasattr(matrix, name)))
+    if isinstance(matrix, SymmetricMatrix):
+        return int(matrix.data.nbytes)
+    return int(np.asarray(matrix).nbytes)
+
+
+def product_flops(result_, *norm_csr_adjs):
+    '''
+        returns # of floating point operations of multiplying result_ by the normalized adjacency matrices from both sides
+        (e.g., Q^T·S·Q, or Q^T·S+S·Q for SimRank*); i.e., two multiply-adds per non-zero of Q and column of S for a dense
+        or symmetric S (halved), and None for a sparse S whose cost depends on its sparsity pattern
+    '''
+    if issparse(result_):
+        return None
+    flops = sum(4 * int(norm_csr_adj.nnz) * result_.shape[0] for norm_csr_adj in norm_csr_adjs)
+    return flops // 2 if isinstance(result_, SymmetricMatrix) else flops
+
+
+def structures_nbytes(structures):
+    '''
+        returns # of bytes of the arrays of structures (e.g., those returned by jacsim_structures)
+    '''
+    return int(sum(array.nbytes for array in pack(structures)[0].values()))
+
+
+class Instrument:
+    '''
+        :callback: a function receiving each event (a dictionary)
+        :log_file: a file where each event is appended as a JSON line
+        :profile: None, 'cprofile', or 'tracemalloc'
+        :profile_phase: the name of the phase to be profiled, e.g., 'precompute' or 'top_k'
+        :profile_file: the file where cProfile statistics are dumped (the last profiled phase)
+        :verbose: if False, the progress messages are not printed
+        :fields: the fields added to all events, e.g., measure='SimRank'
+    '''
+    def __init__(self, callback=None, log_file=None, profile=None, profile_phase=None, profile_file=None, verbose=True, **fields):
+        if profile not in (None, 'cprofile', 'tracemalloc'):
+            raise ValueError("profile should be None, 'cprofile', or 'tracemalloc'")
+        self.callback = callback
+        self.log_file = log_file
+        self.profile = profile
+        self.profile_phase = profile_phase
+        self.profile_file = profile_file
+        self.verbose = verbose
+        self.fields = fields
+        self.enabled = callback is not None or log_file is not None
+
+    def scope(self, verbose=None, **fields):
+        '''
+            returns an Instrument reporting to the same callback and log file whose events also have fields (and which
+            is verbose as this one if verbose is None)
+        '''
+        return Instrument(self.callback, self.log_file, self.profile, self.profile_phase, self.profile_file,
+                          self.verbose if verbose is None else verbose, **dict(self.fields, **fields))
+
+    def message(self, text):
+        '''
+            prints a progress message if the Instrument is verbose
+        '''
+        if self.verbose:
+            print (text)
+
+    def emit(self, event):
+        if not self.enabled:
+            return
+        event = dict(self.fields, **event)
+        if self.callback is not None:
+            self.callback(event)
+        if self.log_file is not None:
+            with open(self.log_file, 'a') as log:
+                log.write(json.dumps(dict(event, time=time.time()), default=str) + '\n')
+
+    def count(self, name, value, **fields):
+        '''
+            emits a counter, e.g., count('nnz', 1024, iteration=2)
+        '''
+        if self.enabled and value is not None:
+            self.emit(dict(fields, event='counter', name=name, value=value))
+
+    def count_iteration(self, iteration, previous_, result_, *norm_csr_adjs):
+        '''
+            emits the counters of an iteration: nnz and bytes of the iterate result_ and flops of its products
+        '''
+        if self.enabled:
+            self.count('nnz', nnz(result_), iteration=iteration)
+            self.count('bytes', nbytes(result_), iteration=iteration)
+            self.count('flops', product_flops(previous_, *norm_csr_adjs), iteration=iteration)
+
+    @contextmanager
+    def phase(self, name, **fields):
+        '''
+            times (and profiles, if name is profile_phase) the statements of a with block as phase name
+        '''
+        if not self.enabled:
+            yield
+            return
+        event = dict(fields, event='phase', phase=name)
+        profiling = self.profile is not None and name == self.profile_phase
+        if profiling and self.profile == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        elif profiling:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            event['seconds'] = time.perf_counter() - start
+            if profiling and self.profile == 'cprofile':
+                profiler.disable()
+                if self.profile_file is not None:
+                    profiler.dump_stats(self.profile_file)
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(20)
+                event['profile'] = stream.getvalue()
+            elif profiling:
+                event['traced_bytes'], event['traced_peak_bytes'] = tracemalloc.get_traced_memory()
+                event['profile'] = [str(stat) for stat in tracemalloc.take_snapshot().compare_to(before, 'lineno')[:20]]
+                if started_tracing:
+                    tracemalloc.stop()
+            self.emit(event)
+
+
+def as_instrument(instrument=None, verbose=None, **fields):
+    '''
+        :instrument: an Instrument, a callback function (wrapped in an Instrument), or None (an Instrument doing nothing)
+        :verbose: whether the progress messages are printed; by default, as instrument does (True for a new Instrument)
+        returns an Instrument whose events also have fields
+    '''
+    if isinstance(instrument, Instrument):
+        return instrument.scope(verbose, **fields)
+    return Instrument(instrument, verbose=True if verbose is None else verbose, **fields)
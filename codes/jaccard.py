@@ -0,0 +1,346 @@
+'''
+Created on Oct 18, 2026
+computes the Jaccard Coefficient of in-link sets for all node pairs by sparse matrix operations
+
+The number of common in-links of nodes a and b is the cell (a,b) of A^T·A (co-citation counts) where A is the binary
+adjacency matrix; the size of the union is obtained from the in-degree vector as |I(a)|+|I(b)|-|I(a)∩I(b)|.
+Hence, the cost depends on the number of node pairs having at least one common in-link, not on n^2.
+
+The intersection sets I(a)∩I(b) required by the "extra values" of JacSim and JPRank are kept in a flattened CSR-like
+index (indptr/members) which is built once; the extra values of all node pairs are then obtained in every iteration
+by gathering the scores of all member pairs and summing them per node pair.
+'''
+from collections import namedtuple
+
+from scipy.sparse import csr_matrix, issparse, triu
+import numpy as np
+
+from symmetric import SymmetricMatrix
+
+IntersectionIndex = namedtuple('IntersectionIndex', ['ds_size', 'indptr', 'members', 'scale', 'chunks', 'pattern', 'source'])
+IntersectionIndex.__doc__ = '''
+    :ds_size: # of nodes
+    :indptr, members: members of I(a)∩I(b) for the k-th node pair are members[indptr[k]:indptr[k+1]]
+    :scale: the factor applied to the sum of each node pair, i.e., 1/(|I(a)|·|I(b)|) (doubled for a==b)
+    :chunks: boundaries of node pairs processed together; each chunk gathers at most chunk_size scores
+    :pattern: the sparsity structure of the symmetric extra values matrix
+    :source: the node pair that each stored value of pattern takes its value from
+'''
+
+
+def binary_adjacency(csr_adj):
+    '''
+        :csr_adj: a sparse adjacency matrix; the value of cell (node_1,node_2) is non-zero if there is an edge node_1 -> node_2
+        returns a copy of the adjacency matrix where duplicated edges are collapsed and all values are set as 1.
+    '''
+    bin_adj = csr_matrix(csr_adj, dtype=float, copy=True)
+    bin_adj.sum_duplicates()
+    bin_adj.eliminate_zeros()
+    bin_adj.data[:] = 1.0
+    return bin_adj
+
+
+def jaccard_coefficient(csr_adj):
+    '''
+        :csr_adj: a sparse adjacency matrix; the value of cell (node_1,node_2) is non-zero if there is an edge node_1 -> node_2
+        returns the compressed symmetric matrix of Jaccard Coefficient of in-link sets (only non-zero values are stored)
+        NOTE:
+            Each pair is stored as both (a,b) and (b,a) and duplicated cells are summed up; thus, the diagonal holds 2.0
+            for every node having in-links, exactly as the pairwise computation does.
+    '''
+    ds_size = csr_adj.shape[0]
+    bin_adj = binary_adjacency(csr_adj)
+    in_degree = np.asarray(bin_adj.sum(axis=0)).ravel()
+    co_citation = triu(bin_adj.transpose() @ bin_adj, format='coo') ## -- cell (a,b), a<=b, is |I(a)∩I(b)|
+    pair_rows = co_citation.row.astype(np.int64)
+    pair_cols = co_citation.col.astype(np.int64)
+    intersection_size = co_citation.data
+    union_size = in_degree[pair_rows] + in_degree[pair_cols] - intersection_size
+    vals = intersection_size / union_size
+
+    csr_jaccard = csr_matrix((np.concatenate((vals, vals)), (np.concatenate((pair_rows, pair_cols)), np.concatenate((pair_cols, pair_rows)))),
+                             shape=(ds_size, ds_size)) ## --- compressed sparse row representation of jaccard matrix
+    return csr_jaccard
+
+
+def _local_arange(counts):
+    '''
+        returns concatenation of arange(c) for every c in counts
+    '''
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    return np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+def _split(weights, chunk_size):
+    '''
+        returns boundaries splitting consecutive items so that the sum of weights in each part is about chunk_size
+    '''
+    cum = np.cumsum(weights, dtype=np.int64)
+    if len(cum) == 0:
+        return np.zeros(1, dtype=np.int64)
+    bounds = np.searchsorted(cum, np.arange(chunk_size, cum[-1], chunk_size, dtype=np.int64), side='right')
+    return np.unique(np.concatenate(([0], bounds, [len(cum)]))).astype(np.int64)
+
+
+def intersection_index(csr_adj, chunk_size=2**24):
+    '''
+        :csr_adj: a sparse adjacency matrix; the value of cell (node_1,node_2) is non-zero if there is an edge node_1 -> node_2
+        :chunk_size: the maximum # of scores gathered at once while computing the extra values (bounds the temporary memory)
+        returns an IntersectionIndex over all node pairs (a,b), a<=b, having at least one common in-link
+    '''
+    ds_size = csr_adj.shape[0]
+    bin_adj = binary_adjacency(csr_adj)
+    bin_adj.sort_indices()
+    in_links = bin_adj.tocsc() ## -- column a keeps the in-links of node a
+    in_links.sort_indices()
+    in_degree = np.diff(in_links.indptr).astype(float)
+
+    #===========================================================================
+        # for each in-link x of node a, every out-link b>=a of x forms the triple (a,b,x), i.e., x is in I(a)∩I(b).
+        # triples are generated for blocks of nodes a and grouped by (a,b) with a stable sort, so members stay sorted.
+    #===========================================================================
+    out_keys = np.repeat(np.arange(ds_size, dtype=np.int64), np.diff(bin_adj.indptr)) * ds_size + bin_adj.indices
+    entry_a = np.repeat(np.arange(ds_size, dtype=np.int64), np.diff(in_links.indptr))
+    entry_x = in_links.indices.astype(np.int64)
+    entry_start = np.searchsorted(out_keys, entry_x * ds_size + entry_a) ## -- position of the first out-link b>=a of x
+    entry_count = bin_adj.indptr[entry_x + 1] - entry_start
+
+    pair_rows = []; pair_cols = []; members = []; lengths = []
+    node_bounds = _split(np.bincount(entry_a, weights=entry_count, minlength=ds_size).astype(np.int64), chunk_size)
+    for a_0, a_1 in zip(node_bounds[:-1], node_bounds[1:]):
+        e_0, e_1 = in_links.indptr[a_0], in_links.indptr[a_1]
+        count = entry_count[e_0:e_1]
+        entries = np.repeat(np.arange(e_0, e_1, dtype=np.int64), count)
+        b = bin_adj.indices[np.repeat(entry_start[e_0:e_1], count) + _local_arange(count)]
+        keys = entry_a[entries] * ds_size + b
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        members.append(entry_x[entries[order]].astype(np.int32))
+        first = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        lengths.append(np.diff(np.append(first, len(keys))))
+        pair_rows.append(keys[first] // ds_size)
+        pair_cols.append(keys[first] % ds_size)
+    pair_rows = np.concatenate(pair_rows); pair_cols = np.concatenate(pair_cols)
+    members = np.concatenate(members); lengths = np.concatenate(lengths)
+    indptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    return _build_index(ds_size, pair_rows, pair_cols, indptr, members, in_degree, chunk_size)
+
+
+def _build_index(ds_size, pair_rows, pair_cols, indptr, members, in_degree, chunk_size):
+    '''
+        returns an IntersectionIndex over node pairs (pair_rows[k],pair_cols[k]) sorted by (row,col) whose members are
+        members[indptr[k]:indptr[k+1]]
+    '''
+    lengths = np.diff(indptr)
+    diagonal = pair_rows == pair_cols
+    scale = np.where(diagonal, 2.0, 1.0) / (in_degree[pair_rows] * in_degree[pair_cols])
+    chunks = _split(lengths * lengths, chunk_size)
+
+    #===========================================================================
+        # the extra values matrix has the same structure in all iterations; only its values are updated.
+    #===========================================================================
+    pair_ids = np.arange(len(pair_rows), dtype=np.int64)
+    rows = np.concatenate((pair_rows, pair_cols[~diagonal]))
+    cols = np.concatenate((pair_cols, pair_rows[~diagonal]))
+    order = np.lexsort((cols, rows))
+    source = np.concatenate((pair_ids, pair_ids[~diagonal]))[order]
+    pattern = csr_matrix((np.ones(len(order)), (rows[order], cols[order])), shape=(ds_size, ds_size))
+    pattern.has_sorted_indices = True
+    return IntersectionIndex(ds_size, indptr, members, scale, chunks, pattern, source)
+
+
+def _pair_sums(result_, indptr, members, chunks):
+    '''
+        returns the sum of result_ over members x members of each node pair; members of the k-th pair are
+        members[indptr[k]:indptr[k+1]] and chunks are boundaries of node pairs processed together
+    '''
+    if issparse(result_) and 4 * result_.nnz > result_.shape[0] * result_.shape[1]:
+        result_ = result_.toarray() ## -- e.g., a barely pruned matrix; gathering scattered cells of a sparse matrix is much slower
+    if issparse(result_):
+        result_ = csr_matrix(result_)
+        result_.sum_duplicates()
+        result_.sort_indices()
+    elif not isinstance(result_, SymmetricMatrix): ## -- see _symmetric_pair_sums
+        flat_result = np.asarray(result_).ravel()
+    sums = np.empty(len(indptr) - 1, dtype=float)
+    for p_0, p_1 in zip(chunks[:-1], chunks[1:]):
+        m_0, m_1 = indptr[p_0], indptr[p_1]
+        lengths = np.diff(indptr[p_0:p_1 + 1])
+        if isinstance(result_, SymmetricMatrix):
+            sums[p_0:p_1] = _symmetric_pair_sums(result_, lengths, members[m_0:m_1].astype(np.int64))
+            continue
+        member_lengths = np.repeat(lengths, lengths) ## -- each member is paired with all members of its own pair
+        member_starts = np.repeat(indptr[p_0:p_1] - m_0, lengths)
+        first = np.repeat(members[m_0:m_1].astype(np.int64), member_lengths)
+        second = members[m_0:m_1][np.repeat(member_starts, member_lengths) + _local_arange(member_lengths)]
+        if issparse(result_):
+            gathered = np.asarray(result_[first, second]).ravel()
+        else:
+            gathered = flat_result[first * result_.shape[1] + second]
+        sums[p_0:p_1] = np.add.reduceat(gathered, np.concatenate(([0], np.cumsum(lengths * lengths)[:-1])))
+    return sums
+
+
+def _symmetric_pair_sums(result_, lengths, members):
+    '''
+        the same as _pair_sums for consecutive node pairs of a SymmetricMatrix; as the members of each pair are sorted,
+        only the cells (m_i,m_j), i<=j, are gathered (they are in the upper-triangular tiles) and the others are mirrored
+    '''
+    positions = _local_arange(lengths) ## -- position of each member in its own pair
+    counts = np.repeat(lengths, lengths) - positions ## -- member i is paired with the members j>=i
+    first = np.repeat(members, counts)
+    second = members[np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts - np.arange(len(members)), counts)]
+    upper = np.add.reduceat(result_.gather_upper(first, second), np.concatenate(([0], np.cumsum(lengths * (lengths + 1) // 2)[:-1])))
+    diagonal = np.add.reduceat(result_.gather_upper(members, members), np.concatenate(([0], np.cumsum(lengths)[:-1])))
+    return 2.0 * upper - diagonal
+
+
+def extra_values(result_, index, bin_adj=None, sample_size=4096):
+    '''
+        :result_: the current similarity matrix (dense, sparse, or a SymmetricMatrix)
+        :index: an IntersectionIndex
+        :bin_adj: the binary adjacency matrix of index (see binary_adjacency); if given and result_ is sparse (e.g., a
+                  pruned matrix), the values are computed from the non-zero cells of result_ by extra_values_sparse
+                  when it is estimated to be cheaper than gathering all member pairs of index
+        :sample_size: # of non-zero cells of result_ sampled to estimate the cost of extra_values_sparse
+        returns the compressed symmetric matrix whose cell (a,b) is the sum of result_ over I(a)∩I(b) x I(a)∩I(b)
+        divided by |I(a)|·|I(b)|
+    '''
+    if bin_adj is not None and issparse(result_) and 0 < 4 * result_.nnz <= result_.shape[0] * result_.shape[1]: ## -- see _pair_sums for denser matrices
+        #===========================================================================
+            # a cell (x,y) costs |O(x)∩O(y)|^2 products in extra_values_sparse and a node pair (a,b) costs
+            # |I(a)∩I(b)|^2 gathered scores here; a gathered score is about ten times slower than a product
+        #===========================================================================
+        result_ = csr_matrix(result_)
+        sample = np.random.default_rng(0).choice(result_.nnz, min(sample_size, result_.nnz), replace=False)
+        rows = np.searchsorted(result_.indptr, sample, side='right') - 1
+        common = np.asarray(bin_adj[rows].multiply(bin_adj[result_.indices[sample]]).sum(axis=1)).ravel()
+        if result_.nnz * np.mean(common**2) < 4 * np.sum(np.diff(index.indptr).astype(float)**2):
+            return extra_values_sparse(result_, bin_adj)
+    sums = _pair_sums(result_, index.indptr, index.members, index.chunks)
+    vals = (sums * index.scale)[index.source]
+    return csr_matrix((vals, index.pattern.indices, index.pattern.indptr), shape=index.pattern.shape)
+
+
+#===========================================================================
+    # local computations used when a few edges are added or removed; only the node pairs (a,b) where a or b is in
+    # the given nodes (i.e., the nodes whose in-link sets changed) are considered.
+#===========================================================================
+def pair_members(bin_adj, nodes):
+    '''
+        :bin_adj: a binary adjacency matrix (see binary_adjacency)
+        :nodes: node ids
+        returns (pair_rows, pair_cols, indptr, members) of all node pairs (a,b), a<=b, having at least one common
+        in-link where a or b is in nodes; pairs are sorted by (a,b) and the members of each pair are sorted
+    '''
+    ds_size = bin_adj.shape[0]
+    nodes = np.unique(np.asarray(nodes, dtype=np.int64))
+    in_links = bin_adj.tocsc()
+    in_nodes = np.zeros(ds_size, dtype=bool); in_nodes[nodes] = True
+
+    #===========================================================================
+        # for each in-link x of node a in nodes, every out-link b of x forms the triple (a,b,x); a pair whose both
+        # nodes are in nodes is only kept when it is generated from its smaller node.
+    #===========================================================================
+    in_count = np.diff(in_links.indptr)[nodes]
+    entry_a = np.repeat(nodes, in_count)
+    entry_x = in_links.indices[np.repeat(in_links.indptr[nodes], in_count) + _local_arange(in_count)].astype(np.int64)
+    out_count = np.diff(bin_adj.indptr)[entry_x]
+    a = np.repeat(entry_a, out_count)
+    x = np.repeat(entry_x, out_count)
+    b = bin_adj.indices[np.repeat(bin_adj.indptr[entry_x], out_count) + _local_arange(out_count)].astype(np.int64)
+    keep = ~in_nodes[b] | (b >= a)
+    a, b, x = a[keep], b[keep], x[keep]
+
+    keys = np.minimum(a, b) * ds_size + np.maximum(a, b)
+    order = np.lexsort((x, keys))
+    keys = keys[order]
+    first = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1]))) if len(keys) else np.zeros(0, dtype=np.int64)
+    indptr = np.append(first, len(keys)).astype(np.int64)
+    return keys[first] // ds_size, keys[first] % ds_size, indptr, x[order].astype(np.int32)
+
+
+def _symmetric(pair_rows, pair_cols, vals, ds_size):
+    '''
+        returns the compressed symmetric matrix whose cells (a,b) and (b,a) are the values of node pairs (a,b), a<=b
+    '''
+    off_diagonal = pair_rows != pair_cols
+    return csr_matrix((np.concatenate((vals, vals[off_diagonal])),
+                       (np.concatenate((pair_rows, pair_cols[off_diagonal])), np.concatenate((pair_cols, pair_rows[off_diagonal])))),
+                      shape=(ds_size, ds_size))
+
+
+def jaccard_rows(bin_adj, nodes):
+    '''
+        returns the compressed symmetric matrix keeping the Jaccard Coefficient of all node pairs (a,b) where a or b is in
+        nodes (the other cells are zero); the values are exactly as those of jaccard_coefficient
+    '''
+    ds_size = bin_adj.shape[0]
+    in_degree = np.asarray(bin_adj.sum(axis=0)).ravel()
+    pair_rows, pair_cols, indptr, members = pair_members(bin_adj, nodes)
+    intersection_size = np.diff(indptr).astype(float)
+    vals = intersection_size / (in_degree[pair_rows] + in_degree[pair_cols] - intersection_size)
+    vals[pair_rows == pair_cols] *= 2.0 ## -- (a,a) is stored twice by jaccard_coefficient
+    return _symmetric(pair_rows, pair_cols, vals, ds_size)
+
+
+def extra_rows(result_, bin_adj, nodes):
+    '''
+        returns the compressed symmetric matrix keeping the extra values of all node pairs (a,b) where a or b is in nodes
+        (the other cells are zero); the values are exactly as those of extra_values
+    '''
+    ds_size = bin_adj.shape[0]
+    in_degree = np.asarray(bin_adj.sum(axis=0)).ravel()
+    pair_rows, pair_cols, indptr, members = pair_members(bin_adj, nodes)
+    sums = _pair_sums(result_, indptr, members, _split(np.diff(indptr)**2, 2**24))
+    scale = np.where(pair_rows == pair_cols, 2.0, 1.0) / (in_degree[pair_rows] * in_degree[pair_cols])
+    return _symmetric(pair_rows, pair_cols, sums * scale, ds_size)
+
+
+def extra_values_sparse(result_, bin_adj):
+    '''
+        :result_: a sparse matrix with a few non-zero cells
+        :bin_adj: a binary adjacency matrix (see binary_adjacency)
+        returns extra_values(result_, intersection_index(bin_adj)) in time proportional to the non-zero cells of result_:
+        a cell (x,y) contributes to all node pairs (a,b) where both a and b are in O(x)∩O(y)
+    '''
+    result_ = csr_matrix(result_).tocoo()
+    result_.sum_duplicates()
+    in_degree = np.asarray(bin_adj.sum(axis=0)).ravel()
+    common = bin_adj[result_.row].multiply(bin_adj[result_.col]).tocsr() ## -- row k is O(x)∩O(y) for the k-th cell (x,y)
+    extra = (common.transpose() @ csr_matrix((result_.data, (np.arange(result_.nnz), np.arange(result_.nnz))), shape=(result_.nnz, result_.nnz)) @ common).tocoo()
+    scale = np.where(extra.row == extra.col, 2.0, 1.0) / (in_degree[extra.row] * in_degree[extra.col])
+    return csr_matrix((extra.data * scale, (extra.row, extra.col)), shape=result_.shape)
+
+
+def update_intersection_index(index, bin_adj, nodes, chunk_size=2**24):
+    '''
+        :index: an IntersectionIndex of the graph before some edges are added or removed
+        :bin_adj: the binary adjacency matrix after the edges are added or removed
+        :nodes: the nodes whose in-link sets changed
+        returns the IntersectionIndex of bin_adj; the node pairs of other nodes keep their members and only the pairs of
+        nodes are computed again
+    '''
+    ds_size = index.ds_size
+    in_nodes = np.zeros(ds_size, dtype=bool); in_nodes[np.asarray(nodes, dtype=np.int64)] = True
+    n_pairs = len(index.scale)
+    pattern = index.pattern.tocoo()
+    upper = pattern.row <= pattern.col
+    pair_rows = np.empty(n_pairs, dtype=np.int64); pair_cols = np.empty(n_pairs, dtype=np.int64)
+    pair_rows[index.source[upper]] = pattern.row[upper]; pair_cols[index.source[upper]] = pattern.col[upper]
+
+    keep = ~(in_nodes[pair_rows] | in_nodes[pair_cols])
+    lengths = np.diff(index.indptr)[keep]
+    kept_members = index.members[np.repeat(index.indptr[:-1][keep], lengths) + _local_arange(lengths)]
+    new_rows, new_cols, new_indptr, new_members = pair_members(bin_adj, nodes)
+
+    pair_rows = np.concatenate((pair_rows[keep], new_rows)); pair_cols = np.concatenate((pair_cols[keep], new_cols))
+    lengths = np.concatenate((lengths, np.diff(new_indptr)))
+    members = np.concatenate((kept_members, new_members))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    order = np.argsort(pair_rows * ds_size + pair_cols, kind='stable')
+    members = members[np.repeat(starts[order], lengths[order]) + _local_arange(lengths[order])]
+    indptr = np.concatenate(([0], np.cumsum(lengths[order]))).astype(np.int64)
+    in_degree = np.asarray(bin_adj.sum(axis=0)).ravel()
+    return _build_index(ds_size, pair_rows[order], pair_cols[order], indptr, members, in_degree, chunk_size)
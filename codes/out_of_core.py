@@ -0,0 +1,133 @@
+'''
+Created on Oct 18, 2026
+out-of-core iterations of SimRank and SimRank* where the score matrices are kept in memory-mapped files
+
+The score matrix S, the next iterate, and the product P=S·Q are n*n np.memmap files; each iteration is computed in
+blocks of rows whose size is derived from a memory budget, so only a few blocks are kept in memory at once.
+Since S is symmetric, Q^T·S = (S·Q)^T = P^T; hence, both measures only need the rows and the columns of P:
+    SimRank:  S' = C·(P^T·Q)+(1−C)·I
+    SimRank*: S' = (C/2)·(P^T+P)+(1−C)·I
+A Checkpoint saves the memory-mapped S in its own ".npy" file (see checkpoint.py), and resuming copies the saved
+scores into S_0 in blocks of rows, so the n*n matrix is never loaded in memory as a whole.
+'''
+import os
+
+from scipy.sparse import issparse
+import numpy as np
+
+
+def row_block_size(ds_size, dtype=np.float64, memory_budget=2**30):
+    '''
+        :ds_size: # of nodes
+        :dtype: data type of the score matrices
+        :memory_budget: # of bytes that blocks of rows may occupy in memory
+        returns # of rows processed at once (about four blocks are alive at the same time)
+    '''
+    return max(1, int(memory_budget // (4 * ds_size * np.dtype(dtype).itemsize)))
+
+
+def identity_memmap(file_name, ds_size, value, dtype=np.float64):
+    '''
+        returns an n*n memory-mapped matrix whose diagonal is set as value
+    '''
+    matrix = np.memmap(file_name, dtype=dtype, mode='w+', shape=(ds_size, ds_size)) ## -- the file is created zero-filled
+    diagonal = np.arange(ds_size)
+    matrix[diagonal, diagonal] = value
+    return matrix
+
+
+def initial_memmap(file_name, initial, dtype=np.float64, block_size=1):
+    '''
+        returns an n*n memory-mapped matrix whose rows are copied from initial (e.g., the scores of a checkpoint, which
+        may be memory-mapped as well) in blocks of block_size rows
+    '''
+    ds_size = initial.shape[0]
+    matrix = np.memmap(file_name, dtype=dtype, mode='w+', shape=(ds_size, ds_size))
+    for start in range(0, ds_size, block_size):
+        end = min(start + block_size, ds_size)
+        rows = initial[start:end]
+        matrix[start:end] = rows.toarray() if issparse(rows) else np.asarray(rows)
+    return matrix
+
+
+def _product(result_, product, norm_csr_adj, block_size):
+    '''
+        product = result_·Q computed in blocks of rows
+    '''
+    for start in range(0, result_.shape[0], block_size):
+        end = min(start + block_size, result_.shape[0])
+        product[start:end] = np.asarray(result_[start:end]) @ norm_csr_adj
+
+
+def _add_diagonal(tile, start, value):
+    rows = np.arange(tile.shape[0])
+    tile[rows, rows + start] += value
+
+
+def simrank_iteration(result_, next_, product, norm_csr_adj, decay_factor, block_size):
+    '''
+        next_ = C·(Q^T·result_·Q)+(1−C)·I; all matrices are memory-mapped, product is used as a temporary matrix
+    '''
+    _product(result_, product, norm_csr_adj, block_size)
+    for start in range(0, result_.shape[0], block_size):
+        end = min(start + block_size, result_.shape[0])
+        tile = np.ascontiguousarray(product[:, start:end].T) @ norm_csr_adj ## -- rows of P^T·Q
+        np.multiply(tile, decay_factor, out=tile)
+        _add_diagonal(tile, start, 1.0-decay_factor)
+        next_[start:end] = tile
+
+
+def simrank_star_iteration(result_, next_, product, norm_csr_adj, decay_factor, block_size):
+    '''
+        next_ = (C/2)·((result_·Q)^T+result_·Q)+(1−C)·I; all matrices are memory-mapped, product is used as a temporary matrix
+    '''
+    _product(result_, product, norm_csr_adj, block_size)
+    for start in range(0, result_.shape[0], block_size):
+        end = min(start + block_size, result_.shape[0])
+        tile = np.array(product[start:end])
+        tile += product[:, start:end].T
+        np.multiply(tile, decay_factor/2.0, out=tile)
+        _add_diagonal(tile, start, 1.0-decay_factor)
+        next_[start:end] = tile
+
+
+def iterate_out_of_core(norm_csr_adj, iterations, decay_factor, iteration, work_dir, memory_budget=2**30, dtype=np.float64, convergence=None, verbose=True,
+                        checkpoint=None, structures=None, initial=None, start=1):
+    '''
+        :norm_csr_adj: the column normalized adjacency matrix (Q)
+        :iterations: # of total iteration
+        :decay_factor: the decay factor (C)
+        :iteration: simrank_iteration or simrank_star_iteration
+        :work_dir: the directory of memory-mapped files
+        :memory_budget: # of bytes that blocks of rows may occupy in memory
+        :dtype: data type of the score matrices (e.g., np.float32 halves the size of the files)
+        :convergence: a Convergence object recording residuals; the iterations stop when its tolerance is reached
+        :verbose: if False, the progress messages are not printed
+        :checkpoint: a Checkpoint saving the memory-mapped score matrix (and structures once) every few iterations
+        :structures: the structures saved with the first checkpoint
+        :initial: the score matrix to start from (e.g., the one of a checkpoint to resume from); by default, S_0
+        :start: the first iteration to compute (e.g., the iteration after the one of the checkpoint)
+        returns the memory-mapped score matrix after the last iteration
+    '''
+    ds_size = norm_csr_adj.shape[0]
+    norm_csr_adj = norm_csr_adj.astype(dtype)
+    block_size = row_block_size(ds_size, dtype, memory_budget)
+    if initial is None:
+        result_ = identity_memmap(os.path.join(work_dir, 'S_0.dat'), ds_size, 1.0-decay_factor, dtype) ## S_0
+    else:
+        result_ = initial_memmap(os.path.join(work_dir, 'S_0.dat'), initial, dtype, block_size)
+    next_ = np.memmap(os.path.join(work_dir, 'S_1.dat'), dtype=dtype, mode='w+', shape=(ds_size, ds_size))
+    product = np.memmap(os.path.join(work_dir, 'P.dat'), dtype=dtype, mode='w+', shape=(ds_size, ds_size))
+    for itr in range (start,iterations+1):
+        if verbose:
+            print ("Iteration {} .... ".format(itr))
+        iteration(result_, next_, product, norm_csr_adj, decay_factor, block_size)
+        result_, next_ = next_, result_
+        converged = convergence is not None and convergence.update(next_, result_)
+        if checkpoint is not None:
+            result_.flush()
+            checkpoint.save(itr, result_, convergence, structures)
+        if converged: ## -- the tolerance is reached
+            break
+    result_.flush()
+    return result_
@@ -0,0 +1,98 @@
+'''
+Created on Oct 18, 2026
+pruning of small similarity scores to keep the score matrix sparse during the iterations
+
+In each iteration, the scores less than a threshold (epsilon) or out of the topL scores of their rows are dropped,
+so the score matrix stays a scipy.sparse matrix and all products are sparse ones. Diagonal scores are always kept.
+The next iterate is built in blocks of rows (e.g., Q^T[rows]·(S·Q) for SimRank) and each block is pruned before the
+blocks are assembled, so the unpruned fill-in of the products is never materialized as a whole; the topL scores of
+each row are selected by a partition of the row instead of sorting all scores.
+If d_k is the largest dropped score in iteration k, the error of the pruned scores is bounded by e_k = c·e_(k−1) + d_k,
+where c is the factor of the measure that scales the previous scores (e.g., C for SimRank and SimRank*).
+For JacSim and JPRank, pruning does not shrink the intersection indexes of their extra values (see jaccard.py), so it
+saves little time or memory for them unless the pruned matrix is very sparse.
+'''
+from scipy.sparse import csr_matrix, vstack
+import numpy as np
+
+
+def _top_per_row(indptr, indices, magnitude, top):
+    '''
+        returns a boolean array keeping the top values (by magnitude) of each row of a csr matrix; ties are broken by
+        column index (the indices of rows need not be sorted)
+    '''
+    counts = np.diff(indptr)
+    keep = np.ones(len(magnitude), dtype=bool)
+    long_rows = np.flatnonzero(counts > top)
+    if len(long_rows) == 0:
+        return keep
+    #===========================================================================
+        # the rows having more than top values are padded into a matrix (by -1, less than all magnitudes)
+        # and the top-th largest value of each row is found by a partition
+    #===========================================================================
+    width = int(counts[long_rows].max())
+    columns = np.arange(width)
+    valid = columns < counts[long_rows][:, None]
+    positions = (indptr[long_rows][:, None] + columns)[valid]
+    padded = np.full((len(long_rows), width), -1.0)
+    padded[valid] = magnitude[positions]
+    kth = np.partition(padded, width - top, axis=1)[:, width - top]
+    greater = padded > kth[:, None]
+    tied = padded == kth[:, None]
+    needed = top - greater.sum(axis=1)
+    over = np.flatnonzero(tied.sum(axis=1) > needed)
+    if len(over) > 0: ## -- the tied values with the smallest column indices fill the rest of top
+        tied_columns = np.full((len(over), width), np.iinfo(np.int64).max)
+        tied_columns[valid[over]] = indices[(indptr[long_rows[over]][:, None] + columns)[valid[over]]]
+        tied_columns[~tied[over]] = np.iinfo(np.int64).max
+        last = np.take_along_axis(np.sort(tied_columns, axis=1), needed[over][:, None] - 1, axis=1)
+        tied[over] &= tied_columns <= last
+    keep[positions] = (greater | tied)[valid]
+    return keep
+
+
+def prune(result_, threshold=None, top=None, start=0):
+    '''
+        :result_: a similarity matrix (dense or sparse), or a block of its rows; a csr matrix should not have
+                  duplicated entries, as the results of scipy.sparse products and sums (its indices are not sorted)
+        :threshold: scores whose absolute values are less than threshold are dropped
+        :top: only top scores (by absolute value) of each row are kept
+        :start: the first row of result_ in the whole matrix (to find the diagonal scores of a block)
+        returns (pruned, dropped)
+            :pruned: the compressed sparse row representation of the pruned matrix
+            :dropped: the largest absolute value of dropped scores
+    '''
+    result_ = csr_matrix(result_)
+    n_rows = result_.shape[0]
+    rows = np.repeat(np.arange(n_rows), np.diff(result_.indptr))
+    magnitude = np.abs(result_.data)
+    keep = np.ones(len(magnitude), dtype=bool)
+    if threshold is not None:
+        keep &= magnitude >= threshold
+    if top is not None:
+        keep &= _top_per_row(result_.indptr, result_.indices, magnitude, top)
+    keep |= rows + start == result_.indices ## -- diagonal scores are always kept
+
+    dropped = float(magnitude[~keep].max()) if (~keep).any() else 0.0
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows[keep], minlength=n_rows))))
+    pruned = csr_matrix((result_.data[keep], result_.indices[keep], indptr), shape=result_.shape)
+    pruned.sort_indices() ## -- only the kept scores are sorted
+    return pruned, dropped
+
+
+def pruned_rows(block_rows, ds_size, threshold=None, top=None, block_size=None):
+    '''
+        :block_rows: a function returning the rows start:end of the next iterate (a sparse matrix) for (start, end)
+        :ds_size: # of rows of the next iterate
+        :threshold, top: see prune
+        :block_size: # of rows built and pruned at once; by default, a block has at most 2^22 scores before pruning
+        returns (pruned, dropped) of the next iterate as prune does
+    '''
+    if block_size is None:
+        block_size = max(1, 2**22 // max(1, ds_size))
+    blocks = []; dropped = 0.0
+    for start in range(0, ds_size, block_size):
+        block, block_dropped = prune(block_rows(start, min(start + block_size, ds_size)), threshold, top, start)
+        blocks.append(block)
+        dropped = max(dropped, block_dropped)
+    return vstack(blocks, format='csr'), dropped
@@ -0,0 +1,173 @@
+'''
+Created on Oct 18, 2026
+output sinks writing the blocks of topK results as soon as they are computed
+
+A sink (a subclass of the abstract class Sink) has write(target_nodes, nodes, values), called once per block of rows,
+and close(). The format is selected by
+the extension of the output file (or explicitly by output_format):
+    "csv" (.txt, .csv): lines "target_node,node,score" as written by Cosine, where score is rounded to 5 digits
+    "csv.gz" (.gz): the same lines in a gzip file
+    "npz" (.npz): columnar arrays src (int32), dst (int32), and score (float32)
+    "npy" (.npy): a structured array whose fields are src (int32), dst (int32), and score (float32)
+The columnar sinks append each block to temporary files, so the memory stays flat; the arrays are assembled when the
+sink is closed. Any object having write and close methods can be given instead of a file name, e.g., a MemorySink which
+keeps the results in memory (for evaluation); read_results() loads the results written in any of the formats (an empty
+file, e.g., when all scores are pruned, gives empty arrays).
+'''
+from abc import ABC, abstractmethod
+import gzip
+import os
+import shutil
+import tempfile
+import warnings
+import zipfile
+
+import numpy as np
+
+COLUMNS = (('src', np.int32), ('dst', np.int32), ('score', np.float32))
+
+
+class Sink(ABC):
+    '''
+        the base class of sinks; sinks are context managers closing themselves
+    '''
+    @abstractmethod
+    def write(self, target_nodes, nodes, values):
+        '''
+            writes a block of (target_nodes, nodes, values) arrays
+        '''
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CsvSink(Sink):
+    '''
+        :file_name: the output file
+        :compress: if True, the lines are written in a gzip file
+    '''
+    def __init__(self, file_name, compress=False, compresslevel=6):
+        self._file = gzip.open(file_name, 'wt', compresslevel=compresslevel) if compress else open(file_name, 'w')
+
+    def write(self, target_nodes, nodes, values):
+        values = values.tolist() if values.dtype == np.float64 else list(values) ## -- e.g., float32 scores are rounded in their own precision
+        self._file.write(''.join([str(target_node)+','+str(node)+','+str(round(value,5))+'\n'
+                                  for target_node, node, value in zip(target_nodes.tolist(), nodes.tolist(), values)]))
+
+    def close(self):
+        self._file.close()
+
+
+def _write_npy(file, part, dtype, count):
+    '''
+        writes the header of an array of count items of dtype and copies its data from the temporary file part
+    '''
+    np.lib.format.write_array_header_1_0(file, {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': (count,)})
+    part.seek(0)
+    shutil.copyfileobj(part, file, 2**22)
+    part.close()
+
+
+class NpzSink(Sink):
+    '''
+        :file_name: the output ".npz" file keeping the arrays src, dst, and score
+    '''
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self._parts = [tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(file_name))) for name, dtype in COLUMNS]
+        self._count = 0
+
+    def write(self, target_nodes, nodes, values):
+        for part, (name, dtype), column in zip(self._parts, COLUMNS, (target_nodes, nodes, values)):
+            part.write(np.asarray(column, dtype=dtype).tobytes())
+        self._count += len(target_nodes)
+
+    def close(self):
+        with zipfile.ZipFile(self.file_name, 'w', allowZip64=True) as archive:
+            for part, (name, dtype) in zip(self._parts, COLUMNS):
+                with archive.open(name + '.npy', 'w', force_zip64=True) as member:
+                    _write_npy(member, part, dtype, self._count)
+
+
+class NpySink(Sink):
+    '''
+        :file_name: the output ".npy" file keeping a structured array whose fields are src, dst, and score
+    '''
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self._dtype = np.dtype(list(COLUMNS))
+        self._part = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(file_name)))
+        self._count = 0
+
+    def write(self, target_nodes, nodes, values):
+        records = np.empty(len(target_nodes), dtype=self._dtype)
+        records['src'] = target_nodes; records['dst'] = nodes; records['score'] = values
+        self._part.write(records.tobytes())
+        self._count += len(records)
+
+    def close(self):
+        with open(self.file_name, 'wb') as file:
+            _write_npy(file, self._part, self._dtype, self._count)
+
+
+class MemorySink(Sink):
+    '''
+        keeps the blocks in memory; arrays() returns the results as (target_nodes, nodes, values)
+    '''
+    def __init__(self):
+        self._blocks = []
+
+    def write(self, target_nodes, nodes, values):
+        self._blocks.append((np.asarray(target_nodes), np.asarray(nodes), np.asarray(values)))
+
+    def arrays(self):
+        if not self._blocks:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+        return tuple(np.concatenate(column) for column in zip(*self._blocks))
+
+
+FORMATS = {'csv': CsvSink, 'csv.gz': lambda file_name: CsvSink(file_name, compress=True), 'npz': NpzSink, 'npy': NpySink}
+EXTENSIONS = {'.txt': 'csv', '.csv': 'csv', '.gz': 'csv.gz', '.npz': 'npz', '.npy': 'npy'}
+
+
+def open_sink(file_name='result.txt', output_format=None):
+    '''
+        :file_name: the output file, or a sink object which is returned as it is
+        :output_format: 'csv', 'csv.gz', 'npz', or 'npy'; by default, it is selected by the extension of file_name
+        returns a sink writing in file_name
+    '''
+    if hasattr(file_name, 'write') and hasattr(file_name, 'close'):
+        return file_name
+    if output_format is None:
+        output_format = EXTENSIONS.get(os.path.splitext(file_name)[1].lower(), 'csv')
+    if output_format not in FORMATS:
+        raise ValueError('output_format should be one of {}'.format(sorted(FORMATS)))
+    return FORMATS[output_format](file_name)
+
+
+def read_results(file_name, output_format=None):
+    '''
+        :file_name: a file written by a sink
+        :output_format: 'csv', 'csv.gz', 'npz', or 'npy'; by default, it is selected by the extension of file_name
+        returns (target_nodes, nodes, values) arrays
+    '''
+    if output_format is None:
+        output_format = EXTENSIONS.get(os.path.splitext(file_name)[1].lower(), 'csv')
+    if output_format == 'npz':
+        with np.load(file_name) as columns:
+            return columns['src'], columns['dst'], columns['score']
+    if output_format == 'npy':
+        records = np.load(file_name)
+        return records['src'], records['dst'], records['score']
+    with warnings.catch_warnings(): ## -- an empty file is a valid output, e.g., when all scores are pruned
+        warnings.filterwarnings('ignore', message='loadtxt: input contained no data', category=UserWarning)
+        lines = np.loadtxt(file_name, delimiter=',', ndmin=2) ## -- gzip files are decompressed by numpy
+    if len(lines) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    return lines[:, 0].astype(np.int64), lines[:, 1].astype(np.int64), lines[:, 2]
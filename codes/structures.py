@@ -0,0 +1,66 @@
+'''
+Created on Oct 18, 2026
+converts the precomputed structures of the measures (sparse matrices, intersection indexes, and arrays) to flat arrays
+
+The structures that do not depend on parameters (e.g., those returned by jacsim_structures) are dictionaries of
+csr matrices, IntersectionIndex tuples, and numpy arrays; score matrices may also be SymmetricMatrix objects.
+pack() flattens them into a dictionary of named numpy arrays plus a small layout describing how they are put together
+again, so they can be placed in shared memory or stored in binary files, and unpack() rebuilds them without copying
+the arrays.
+'''
+from scipy.sparse import csr_matrix, issparse
+import numpy as np
+
+from jaccard import IntersectionIndex
+from symmetric import SymmetricMatrix
+
+
+def pack(structures):
+    '''
+        :structures: a dictionary of csr matrices, IntersectionIndex tuples, SymmetricMatrix objects, and numpy arrays
+        returns (arrays, layout)
+            :arrays: a dictionary of numpy arrays named as 'structure.field'
+            :layout: a small dictionary describing the type of each structure (used by unpack)
+    '''
+    arrays = {}; layout = {}
+    for name, value in structures.items():
+        if issparse(value):
+            value = csr_matrix(value)
+            layout[name] = ('csr', value.shape)
+            arrays[name + '.data'] = value.data
+            arrays[name + '.indices'] = value.indices
+            arrays[name + '.indptr'] = value.indptr
+        elif isinstance(value, SymmetricMatrix):
+            layout[name] = ('symmetric', value.ds_size, value.block_size)
+            arrays[name + '.data'] = value.data
+        elif isinstance(value, IntersectionIndex):
+            fields, fields_layout = pack(value._asdict())
+            layout[name] = ('index', fields_layout)
+            arrays.update((name + '.' + key, array) for key, array in fields.items())
+        else:
+            layout[name] = ('array',)
+            arrays[name] = np.asarray(value)
+    return arrays, layout
+
+
+def unpack(arrays, layout, prefix=''):
+    '''
+        :arrays: a dictionary (or npz file) of numpy arrays returned by pack
+        :layout: the layout returned by pack
+        returns the dictionary of structures
+    '''
+    structures = {}
+    for name, kind in layout.items():
+        key = prefix + name
+        if kind[0] == 'csr':
+            structures[name] = csr_matrix((arrays[key + '.data'], arrays[key + '.indices'], arrays[key + '.indptr']), shape=tuple(kind[1]))
+        elif kind[0] == 'symmetric':
+            structures[name] = SymmetricMatrix(kind[1], kind[2], dtype=arrays[key + '.data'].dtype)
+            structures[name].data = arrays[key + '.data']
+        elif kind[0] == 'index':
+            fields = unpack(arrays, kind[1], key + '.')
+            fields['ds_size'] = int(fields['ds_size'])
+            structures[name] = IntersectionIndex(**fields)
+        else:
+            structures[name] = arrays[key]
+    return structures
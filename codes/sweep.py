@@ -0,0 +1,145 @@
+'''
+Created on Oct 18, 2026
+runs a measure for a grid of parameters over several datasets in parallel
+
+The structures that do not depend on parameters (the normalized adjacency matrices, Jaccard matrices, and intersection
+indexes) are computed once per dataset and copied into shared memory; the configurations of the grid are distributed
+over a process pool whose workers rebuild the structures on the shared arrays instead of receiving copies of them.
+Each configuration writes its own output file.
+'''
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import shared_memory
+import os
+
+import numpy as np
+
+from instrument import as_instrument
+from JacSim import JacSim_MF, jacsim_structures
+from JPRank import JPRank, jprank_structures
+from SimRank import simrank, simrank_structures
+from SimRank_star import simrank_star
+from structures import pack, unpack
+
+MEASURES = {
+    'SimRank': (simrank_structures, simrank),
+    'SimRank*': (simrank_structures, simrank_star),
+    'JacSim': (jacsim_structures, JacSim_MF),
+    'JPRank': (jprank_structures, JPRank),
+} ## -- measure name -> (function computing the structures, function running the measure)
+
+_worker_structures = {} ## -- the structures of each dataset in each worker process
+_worker_blocks = [] ## -- the shared memory blocks attached by each worker process
+
+
+def _share(structures):
+    '''
+        copies the arrays of structures into shared memory blocks; returns (blocks, (descriptors, layout))
+    '''
+    arrays, layout = pack(structures)
+    blocks = []; descriptors = {}
+    for key, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        descriptors[key] = (block.name, array.shape, array.dtype.str)
+    return blocks, (descriptors, layout)
+
+
+def _attach(descriptors):
+    '''
+        returns the arrays of shared memory blocks without copying them
+    '''
+    arrays = {}
+    for key, (name, shape, dtype) in descriptors.items():
+        block = shared_memory.SharedMemory(name=name)
+        _worker_blocks.append(block) ## -- the block must stay open as long as its array is used
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return arrays
+
+
+def _init_worker(shared):
+    for dataset, (descriptors, layout) in shared.items():
+        _worker_structures[dataset] = unpack(_attach(descriptors), layout)
+
+
+def _instrument(options):
+    '''
+        returns the Instrument of the options given to the measure, so that verbose=False also quiets the sweep itself
+    '''
+    return as_instrument(options.get('instrument'), options.get('verbose', True))
+
+
+def _run(measure, structures, job, options):
+    dataset, graph, params, file_name = job
+    _instrument(options).message('Running {} on {} with {} ...'.format(measure, dataset, params))
+    report = MEASURES[measure][1](graph, file_name=file_name, structures=structures, **params, **options)
+    return {'dataset': dataset, 'params': params, 'file_name': file_name, 'report': report}
+
+
+def _run_worker(measure, job, options):
+    return _run(measure, _worker_structures[job[0]], job, options)
+
+
+def configurations(grid):
+    '''
+        :grid: a dictionary of parameter name -> list of values
+        returns a list of dictionaries, one per combination of values
+    '''
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+
+def result_file(out_dir, dataset, measure, params, extension='.txt'):
+    '''
+        returns the output file of a configuration, e.g., "out_dir/Cora_JPRank_alpha_in=0.2_beta=0.5.txt"
+        :extension: the extension of the output file, which selects its format (see sinks.py)
+    '''
+    name = '_'.join([dataset, measure.replace('*', '_star')] + ['{}={}'.format(key, value) for key, value in params.items()])
+    return os.path.join(out_dir, name + extension)
+
+
+def sweep(datasets, measure, grid=None, out_dir='.', workers=1, extension='.txt', **options):
+    '''
+        :datasets: a dictionary of dataset name -> graph file (edgelist), or a list of graph files named by their file names
+        :measure: 'SimRank', 'SimRank*', 'JacSim', or 'JPRank'
+        :grid: a dictionary of parameter name -> list of values, e.g., {'alpha_in': [0.2, 0.4], 'alpha_out': [0.2], 'beta': [0.5]}
+        :out_dir: the directory of output files; each configuration is written in its own file (see result_file)
+        :workers: # of processes running the configurations
+        :extension: the extension of output files, e.g., '.txt', '.gz', or '.npz'
+        :options: the arguments given to the measure in all configurations, e.g., iterations=5, topK=30; their instrument and
+                  verbose also apply to computing the structures and to the progress messages of the sweep
+        returns a list of dictionaries (dataset, params, file_name, report), one per configuration
+    '''
+    if not isinstance(datasets, dict):
+        datasets = {os.path.splitext(os.path.basename(graph))[0]: graph for graph in datasets}
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(dataset, graph, params, result_file(out_dir, dataset, measure, params, extension))
+            for dataset, graph in datasets.items() for params in configurations(grid or {})]
+
+    #===========================================================================
+        # the structures that do not depend on parameters are computed once per dataset
+    #===========================================================================
+    structures = {dataset: MEASURES[measure][0](graph, _instrument(options)) for dataset, graph in datasets.items()}
+    if workers <= 1:
+        return [_run(measure, structures[job[0]], job, options) for job in jobs]
+
+    blocks = []
+    try:
+        shared = {}
+        for dataset in datasets:
+            dataset_blocks, shared[dataset] = _share(structures.pop(dataset)) ## -- the private copy is released once it is shared
+            blocks += dataset_blocks
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,)) as executor:
+            futures = [executor.submit(_run_worker, measure, job, options) for job in jobs]
+            return [future.result() for future in futures]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+if __name__=='__main__':
+
+    sweep({'BlogCatalog': '../datasets/BlogCatalog/BlogCatalog_undirected_graph.txt'}, 'JPRank',
+          grid={'alpha_in': [0.2, 0.4], 'alpha_out': [0.2, 0.4], 'beta': [0.5]}, out_dir='sweep', workers=4, iterations=5, topK=30)
@@ -0,0 +1,220 @@
+'''
+Created on Oct 18, 2026
+symmetric score matrices stored as packed upper-triangular tiles
+
+The score matrices of SimRank, SimRank*, JacSim, and JPRank are symmetric; a SymmetricMatrix only stores the tiles
+(I,J), I<=J, of size block_size*block_size in a single packed array (about half of the memory of a dense matrix).
+Rows are expanded lazily when they are requested, and each iteration only computes the upper-triangular tiles:
+    Q^T·S·Q   is accumulated by row blocks a of S: tile (I,J) += Q[a,I]^T·(S[a,:]·Q)[:,J] for I<=J, where the tiles
+              Q[a,I]^T are sliced once (see transposed_blocks) and the empty ones are skipped
+    Q^T·S+S·Q is accumulated by row blocks a of P=S·Q: tile (a,J) += P[a,J] for J>=a and tile (I,a) += P[a,I]^T for I<=a
+As S is symmetric, a row block S[a,:]·Q is computed as (Q^T·S[:,a])^T from a C-contiguous column block of S, so all
+products are sparse·dense ones and no dense operand is copied into another memory order.
+The extra values of JacSim and JPRank gather scores through the packed offsets, which costs more than the flat index of
+a dense matrix; for those measures the symmetric mode saves memory rather than time (it is about 10% slower).
+The products are summed in another order than the dense ones, so the scores agree with the dense mode only up to
+rounding (about 1e-16 on scores below 1); as with the ties of compute_cosine, nodes whose scores are tied (or differ
+in the last bit) may be ordered differently in the topK results.
+'''
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class SymmetricMatrix:
+    '''
+        an n*n symmetric matrix whose upper-triangular tiles are kept in a packed array
+        :ds_size: # of nodes
+        :block_size: # of rows (and columns) of tiles
+        :dtype: data type of scores
+    '''
+    def __init__(self, ds_size, block_size=None, dtype=np.float64):
+        self.ds_size = ds_size
+        self.block_size = max(1, min(block_size or 1024, ds_size))
+        self.bounds = np.append(np.arange(0, ds_size, self.block_size), ds_size)
+        sizes = np.diff(self.bounds)
+        n_blocks = len(sizes)
+        self.offsets = np.full((n_blocks, n_blocks), -1, dtype=np.int64) ## -- position of tile (I,J), I<=J, in the packed array
+        offset = 0
+        for block_i in range(n_blocks):
+            for block_j in range(block_i, n_blocks):
+                self.offsets[block_i, block_j] = offset
+                offset += sizes[block_i] * sizes[block_j]
+        self.data = np.zeros(offset, dtype=dtype)
+        self._row_offsets = None ## -- see _positions
+
+    @classmethod
+    def identity(cls, ds_size, value=1.0, block_size=None, dtype=np.float64):
+        matrix = cls(ds_size, block_size, dtype)
+        matrix.add_diagonal(value)
+        return matrix
+
+    @property
+    def shape(self):
+        return (self.ds_size, self.ds_size)
+
+    @property
+    def n_blocks(self):
+        return len(self.bounds) - 1
+
+    def tile(self, block_i, block_j):
+        '''
+            returns the tile (block_i,block_j), block_i<=block_j, as a view of the packed array
+        '''
+        rows = self.bounds[block_i+1] - self.bounds[block_i]
+        cols = self.bounds[block_j+1] - self.bounds[block_j]
+        offset = self.offsets[block_i, block_j]
+        return self.data[offset:offset + rows*cols].reshape(rows, cols)
+
+    def row_block(self, block_i):
+        '''
+            returns the rows of the block_i-th row block as a dense matrix
+        '''
+        rows = self.bounds[block_i+1] - self.bounds[block_i]
+        block = np.empty((rows, self.ds_size), dtype=self.data.dtype)
+        for block_j in range(self.n_blocks):
+            if block_j < block_i:
+                block[:, self.bounds[block_j]:self.bounds[block_j+1]] = self.tile(block_j, block_i).T
+            else:
+                block[:, self.bounds[block_j]:self.bounds[block_j+1]] = self.tile(block_i, block_j)
+        return block
+
+    def column_block(self, block_j):
+        '''
+            returns the columns of the block_j-th column block as a dense (C-contiguous) matrix, i.e., the transpose of
+            row_block(block_j)
+        '''
+        cols = self.bounds[block_j+1] - self.bounds[block_j]
+        block = np.empty((self.ds_size, cols), dtype=self.data.dtype)
+        for block_i in range(self.n_blocks):
+            if block_i <= block_j:
+                block[self.bounds[block_i]:self.bounds[block_i+1]] = self.tile(block_i, block_j)
+            else:
+                block[self.bounds[block_i]:self.bounds[block_i+1]] = self.tile(block_j, block_i).T
+        return block
+
+    def __getitem__(self, key):
+        '''
+            matrix[start:end] expands the rows, matrix[i] expands a row, and matrix[rows, cols] gathers scores
+        '''
+        if isinstance(key, tuple):
+            return self.gather(*key)
+        if isinstance(key, (int, np.integer)):
+            return self[key:key+1][0]
+        start, end, step = key.indices(self.ds_size)
+        first = np.searchsorted(self.bounds, start, side='right') - 1
+        last = np.searchsorted(self.bounds, max(start, end-1), side='right') - 1
+        rows = np.concatenate([self.row_block(block_i) for block_i in range(first, min(last, self.n_blocks-1) + 1)]) if end > start else \
+               np.empty((0, self.ds_size), dtype=self.data.dtype)
+        return rows[start - self.bounds[first]:end - self.bounds[first]:step]
+
+    def _cell_positions(self, rows, cols):
+        '''
+            returns the positions of cells (rows,cols) of the upper-triangular tiles in the packed array
+        '''
+        if self._row_offsets is None: ## -- row_offsets[r·n_blocks+J] = offsets[R,J] + (r-bounds[R])·width[J] - bounds[J], J>=R
+            nodes = np.arange(self.ds_size)
+            blocks = nodes // self.block_size
+            self._row_offsets = (self.offsets[blocks] + np.outer(nodes - self.bounds[blocks], np.diff(self.bounds)) - self.bounds[:-1]).ravel()
+        return self._row_offsets[rows * self.n_blocks + cols // self.block_size] + cols
+
+    def _positions(self, rows, cols):
+        '''
+            returns the positions of cells (rows,cols) in the packed array; a cell (r,c) is read as (min,max), which is
+            always in an upper-triangular tile (cells of the lower triangle are mirrored)
+        '''
+        rows = np.asarray(rows, dtype=np.int64); cols = np.asarray(cols, dtype=np.int64)
+        return self._cell_positions(np.minimum(rows, cols), np.maximum(rows, cols))
+
+    def gather(self, rows, cols):
+        '''
+            returns the scores of cells (rows[i],cols[i])
+        '''
+        return self.data[self._positions(rows, cols)]
+
+    def gather_upper(self, rows, cols):
+        '''
+            returns the scores of cells (rows[i],cols[i]) where rows[i]<=cols[i] (faster than gather; nothing is mirrored)
+        '''
+        return self.data[self._cell_positions(np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))]
+
+    def toarray(self):
+        return self[0:self.ds_size]
+
+    def same_tiles(self, other):
+        return isinstance(other, SymmetricMatrix) and self.ds_size == other.ds_size and self.block_size == other.block_size
+
+    def difference_norm(self, other, norm='max', chunk_size=2**22):
+        '''
+            returns the max-abs ('max') or Frobenius ('fro') norm of self-other, where other has the same tiles, from
+            the packed arrays (the rows are not expanded); the tiles (I,J), I<J, are counted twice in 'fro'
+        '''
+        value = 0.0
+        for start in range(0, len(self.data), chunk_size):
+            diff = self.data[start:start+chunk_size] - other.data[start:start+chunk_size]
+            if norm == 'max':
+                value = max(value, float(np.abs(diff).max()) if diff.size else 0.0)
+            else:
+                value += 2.0 * float(np.dot(diff, diff))
+        if norm == 'max':
+            return value
+        for block_i in range(self.n_blocks): ## -- the diagonal tiles keep both triangles
+            diff = (self.tile(block_i, block_i) - other.tile(block_i, block_i)).ravel()
+            value -= float(np.dot(diff, diff))
+        return float(np.sqrt(max(value, 0.0)))
+
+    def add_diagonal(self, value):
+        diagonal = np.arange(self.ds_size)
+        self.data[self._positions(diagonal, diagonal)] += value
+
+    def add_sparse(self, csr, scale=1.0):
+        '''
+            adds scale·csr where csr is a symmetric sparse matrix; only its cells in the upper-triangular tiles are used
+        '''
+        coo = csr_matrix(csr).tocoo()
+        coo.sum_duplicates()
+        upper = coo.row // self.block_size <= coo.col // self.block_size
+        self.data[self._cell_positions(coo.row[upper], coo.col[upper])] += scale * coo.data[upper]
+
+    def add_congruence(self, result_, blocks, scale=1.0):
+        '''
+            adds scale·Q^T·result_·Q where result_ is a SymmetricMatrix with the same tiles and blocks=transposed_blocks(Q)
+        '''
+        for block_a in range(self.n_blocks):
+            product = blocks['transpose'] @ result_.column_block(block_a) ## -- (S[a,:]·Q)^T = Q^T·S[:,a]
+            for block_j in range(self.n_blocks):
+                columns = np.multiply(product[self.bounds[block_j]:self.bounds[block_j+1]].T, scale, order='C') ## -- (S[a,:]·Q)[:,J]
+                for block_i in range(block_j + 1):
+                    q_tile = blocks[block_a, block_i] ## -- Q[a,I]^T (None if it is empty)
+                    if q_tile is not None:
+                        self.tile(block_i, block_j)[...] += q_tile @ columns
+
+    def add_star(self, result_, norm_csr_adj, scale=1.0):
+        '''
+            adds scale·(Q^T·result_+result_·Q) where result_ is a SymmetricMatrix with the same tiles
+        '''
+        norm_csr_adj_t = csr_matrix(norm_csr_adj).transpose().tocsr()
+        for block_a in range(self.n_blocks):
+            product = norm_csr_adj_t @ result_.column_block(block_a) ## -- P[a,:]^T where P=S·Q
+            for block_j in range(self.n_blocks):
+                rows = product[self.bounds[block_j]:self.bounds[block_j+1]] ## -- P[a,J]^T
+                if block_j >= block_a:
+                    self.tile(block_a, block_j)[...] += scale * rows.T
+                if block_j <= block_a:
+                    self.tile(block_j, block_a)[...] += scale * rows
+
+
+def transposed_blocks(norm_csr_adj, block_size):
+    '''
+        returns a dictionary of the tiles Q[a,I]^T of the column normalized adjacency matrix (used by add_congruence);
+        the empty tiles are None, so they are skipped
+    '''
+    ds_size = norm_csr_adj.shape[0]
+    bounds = np.append(np.arange(0, ds_size, max(1, min(block_size or 1024, ds_size))), ds_size)
+    norm_csr_adj = csr_matrix(norm_csr_adj)
+    blocks = {'transpose': norm_csr_adj.transpose().tocsr()}
+    for block_a in range(len(bounds) - 1):
+        q_block = norm_csr_adj[bounds[block_a]:bounds[block_a+1]].transpose().tocsr() ## -- Q[a,:]^T
+        for block_i in range(len(bounds) - 1):
+            q_tile = q_block[bounds[block_i]:bounds[block_i+1]]
+            blocks[block_a, block_i] = q_tile if q_tile.nnz > 0 else None
+    return blocks
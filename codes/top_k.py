@@ -0,0 +1,130 @@
+'''
+Created on Oct 18, 2026
+extracts the topK results of each target node from a similarity matrix and writes them in an output file
+
+The rows of the similarity matrix are processed in blocks; the topK nodes of each row are selected by np.argpartition,
+so a full sort of the matrix is never materialized. The default output format is the same as the one of Cosine, i.e.,
+each line is "target_node,node,score" and the results of each target node are sorted by descending order of scores;
+the blocks can also be written in gzip or columnar binary files (see sinks.py).
+'''
+from scipy.sparse import issparse
+import numpy as np
+
+from instrument import as_instrument
+from sinks import open_sink
+
+
+def _sorted_results(rows, nodes, values, topK, n_rows):
+    '''
+        sorts the candidates of each row by descending order of values (ties are broken by node id) and keeps topK of them
+    '''
+    order = np.lexsort((nodes, -values, rows))
+    rows = rows[order]; nodes = nodes[order]; values = values[order]
+    counts = np.bincount(rows, minlength=n_rows)
+    rank = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    keep = rank < topK
+    return rows[keep], nodes[keep], values[keep]
+
+
+def select_top_k(scores, targets, topK):
+    '''
+        :scores: a matrix of size (#of target nodes * #of nodes) containing the similarity scores of target nodes
+        :targets: node ids of the rows of scores
+        :topK: # of results kept for each target node
+        returns (target_nodes, nodes, values) arrays; the results of each target node are sorted by descending order of
+        scores and ties are broken by node id. The target node itself, '0' and NaN scores are not reported.
+    '''
+    scores = np.array(scores, dtype=np.result_type(scores, np.float32)) ## -- a copy, since invalid scores are masked in place
+    targets = np.asarray(targets, dtype=np.int64)
+    n_rows, ds_size = scores.shape
+    if topK <= 0 or scores.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    in_range = targets < ds_size
+    scores[np.arange(n_rows)[in_range], targets[in_range]] = 0.0
+    np.copyto(scores, -np.inf, where=~(scores != 0) | np.isnan(scores))
+
+    if topK >= ds_size:
+        rows, nodes = np.nonzero(scores > -np.inf)
+        rows, nodes, values = _sorted_results(rows, nodes, scores[rows, nodes], topK, n_rows)
+    else:
+        #===========================================================================
+            # selecting topK candidates of each row; rows where the topK-th score is tied with other nodes are
+            # handled separately so that the result is exactly the one of a full sort
+        #===========================================================================
+        candidates = np.argpartition(scores, ds_size - topK, axis=1)[:, ds_size - topK:]
+        candidate_values = np.take_along_axis(scores, candidates, axis=1)
+        kth_scores = candidate_values.min(axis=1)
+        tied = (kth_scores > -np.inf) & ((scores >= kth_scores[:, None]).sum(axis=1) > topK)
+        rows = np.repeat(np.arange(n_rows), topK).reshape(n_rows, topK)[~tied].ravel()
+        nodes = candidates[~tied].ravel()
+        values = candidate_values[~tied].ravel()
+        tied_rows = np.flatnonzero(tied)
+        if len(tied_rows) > 0:
+            tie_rows, tie_nodes = np.nonzero(scores[tied_rows] >= kth_scores[tied_rows, None])
+            rows = np.concatenate((rows, tied_rows[tie_rows]))
+            nodes = np.concatenate((nodes, tie_nodes))
+            values = np.concatenate((values, scores[tied_rows[tie_rows], tie_nodes]))
+        valid = values > -np.inf
+        rows, nodes, values = _sorted_results(rows[valid], nodes[valid], values[valid], topK, n_rows)
+    return targets[rows], nodes.astype(np.int64), values
+
+
+def select_top_k_sparse(scores, targets, topK):
+    '''
+        the same as select_top_k where scores is a sparse matrix; only its stored values are candidates
+    '''
+    scores = scores.tocoo()
+    targets = np.asarray(targets, dtype=np.int64)
+    values = np.asarray(scores.data, dtype=np.result_type(scores.dtype, np.float32))
+    rows = scores.row.astype(np.int64); nodes = scores.col.astype(np.int64)
+    valid = (nodes != targets[rows]) & (values != 0) & ~np.isnan(values)
+    if topK <= 0:
+        valid[:] = False
+    rows, nodes, values = _sorted_results(rows[valid], nodes[valid], values[valid], topK, len(targets))
+    return targets[rows], nodes, values
+
+
+def top_k_blocks(result_, topK, block_size=None):
+    '''
+        :result_: a similarity matrix of size (#of nodes * #of nodes)
+        :topK: # of results kept for each target node
+        :block_size: # of rows processed at once; by default, about 2^24 scores are kept in memory per block
+        yields (target_nodes, nodes, values) for each block of rows
+    '''
+    ds_size = result_.shape[0]
+    if block_size is None:
+        block_size = max(1, 2**24 // max(1, result_.shape[1]))
+    for start in range(0, ds_size, block_size):
+        end = min(start + block_size, ds_size)
+        if issparse(result_):
+            yield select_top_k_sparse(result_[start:end], np.arange(start, end), topK)
+        else:
+            yield select_top_k(np.asarray(result_[start:end]), np.arange(start, end), topK)
+
+
+def write_blocks(blocks, file_name='result.txt', output_format=None, instrument=None, verbose=None):
+    '''
+        :blocks: an iterable of (target_nodes, nodes, values) arrays
+        :file_name: the output file (its extension selects the format, see sinks.py) or a sink object
+        :output_format: 'csv', 'csv.gz', 'npz', or 'npy'; by default, it is selected by the extension of file_name
+        :instrument: the Instrument of the measure (see instrument.py); the progress message is printed through it
+        :verbose: if False, the progress message is not printed; by default, as instrument does
+        NOTE: each block is written as soon as it is yielded, so the results are never kept in memory as a whole.
+    '''
+    instrument = as_instrument(instrument, verbose)
+    with open_sink(file_name, output_format) as sink:
+        for target_nodes, nodes, values in blocks:
+            sink.write(target_nodes, nodes, values)
+    instrument.message('The result is written in the file...')
+
+
+def write_top_k(result_, topK, file_name='result.txt', block_size=None, output_format=None, instrument=None, verbose=None):
+    '''
+        :result_: a similarity matrix of size (#of nodes * #of nodes)
+        :topK: topK results to be written in an output file by descending order
+        :file_name: the output file or a sink object
+        :block_size: # of rows processed at once
+        :output_format, instrument, verbose: see write_blocks
+    '''
+    write_blocks(top_k_blocks(result_, topK, block_size), file_name, output_format, instrument, verbose)
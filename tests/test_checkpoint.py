@@ -0,0 +1,55 @@
+'''
+checks that a checkpoint is only resumed with the parameters it was written with, and the checkpoints of the
+out-of-core mode
+'''
+import os
+
+from scipy import sparse
+import numpy as np
+import pytest
+
+from checkpoint import load_checkpoint
+from SimRank import simrank
+from sinks import MemorySink
+
+
+def _run(tmp_path, **params):
+    csr_adj = sparse.random(40, 40, density=0.1, format='csr', random_state=0)
+    sink = MemorySink()
+    simrank(csr_adj, topK=5, file_name=sink, verbose=False, **params)
+    return sink.arrays()
+
+
+def test_resume_with_same_parameters(tmp_path):
+    checkpoint_file = str(tmp_path / 'run.npz')
+    _run(tmp_path, iterations=2, symmetric=True, block_size=16, checkpoint_file=checkpoint_file)
+    resumed = _run(tmp_path, iterations=4, symmetric=True, block_size=16, resume_from=checkpoint_file)
+    expected = _run(tmp_path, iterations=4, symmetric=True, block_size=16)
+    for resumed_column, expected_column in zip(resumed, expected):
+        assert np.allclose(resumed_column, expected_column)
+
+
+@pytest.mark.parametrize('params, changed', [({'symmetric': True, 'block_size': 16}, {'block_size': 8}),
+                                             ({'prune_threshold': 1e-3}, {'prune_threshold': 1e-2}),
+                                             ({'prune_top': 5}, {'prune_top': 10})])
+def test_resume_rejects_other_parameters(tmp_path, params, changed):
+    checkpoint_file = str(tmp_path / 'run.npz')
+    _run(tmp_path, iterations=2, checkpoint_file=checkpoint_file, **params)
+    with pytest.raises(ValueError):
+        _run(tmp_path, iterations=4, resume_from=checkpoint_file, **dict(params, **changed))
+
+
+def test_resume_out_of_core(tmp_path):
+    checkpoint_file = str(tmp_path / 'run.npz')
+    params = {'out_of_core': True, 'memory_budget': 40*40*8*4*8, 'work_dir': str(tmp_path)} ## -- blocks of 8 rows
+    _run(tmp_path, iterations=1, checkpoint_file=checkpoint_file, **params)
+    _run(tmp_path, iterations=2, checkpoint_file=checkpoint_file, resume_from=checkpoint_file, **params)
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith('run.')) == ['run.npz', 'run.scores_2.npy', 'run.structures.npz'] ## -- the scores of iteration 1 are removed
+    state = load_checkpoint(checkpoint_file)
+    assert isinstance(state['result_'], np.memmap) and state['iteration'] == 2
+    resumed = _run(tmp_path, iterations=4, resume_from=checkpoint_file, **params)
+    expected = _run(tmp_path, iterations=4)
+    for resumed_column, expected_column in zip(resumed, expected):
+        assert np.allclose(resumed_column, expected_column)
+    with pytest.raises(ValueError): ## -- the scores of float32 files differ from the float64 ones
+        _run(tmp_path, iterations=4, resume_from=checkpoint_file, dtype=np.float32, **params)
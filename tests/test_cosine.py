@@ -0,0 +1,59 @@
+'''
+compares the blocked Cosine with the per-node loop of the original implementation when many nodes are tied, and
+CosineIndex with compute_cosine
+'''
+import numpy as np
+
+from cosine_global import compute_cosine, cosine_rows
+from cosine_index import CosineIndex
+from sinks import MemorySink
+
+
+def _per_node(graph_reps, topK):
+    '''
+        the per-node loop of the original compute_cosine; the vectors shared by several nodes are scored once, so
+        their ties are exact whatever the BLAS, and the stable sort breaks them by node id
+    '''
+    distinct, inverse = np.unique(graph_reps, axis=0, return_inverse=True)
+    distinct_norm = np.linalg.norm(distinct, axis=1)
+    results = []
+    for row in range(len(graph_reps)):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sim_values_all = (distinct.dot(graph_reps[row]) / (distinct_norm * np.linalg.norm(graph_reps[row])))[inverse.ravel()]
+        sim_values = {node: sim_values_all[node] for node in range(len(sim_values_all))
+                      if node != row and sim_values_all[node] != 0 and not np.isnan(sim_values_all[node])}
+        sim_values = sorted(sim_values.items(), key=lambda x: x[1], reverse=True)[:topK]
+        results += [(row, node, value) for node, value in sim_values]
+    return results
+
+
+def test_ties_of_duplicated_vectors():
+    graph_reps = np.random.default_rng(0).standard_normal((300, 16))
+    graph_reps[::3] = graph_reps[0] ## -- 100 nodes share a vector
+    graph_reps[5] = 0.0 ## -- NaN scores
+    expected = _per_node(graph_reps, 7)
+    for workers in (1, 3):
+        sink = MemorySink()
+        compute_cosine(graph_reps, 7, block_size=32, workers=workers, file_name=sink)
+        target_nodes, nodes, values = sink.arrays()
+        assert list(zip(target_nodes.tolist(), nodes.tolist())) == [(row, node) for row, node, value in expected]
+        assert np.allclose(values, [value for row, node, value in expected], rtol=0, atol=1e-12)
+    assert nodes[target_nodes == 3].tolist() == [0, 6, 9, 12, 15, 18, 21] ## -- the first copies of the shared vector are kept
+
+
+def test_index_keeps_dtype_and_recall_of_compute_cosine(tmp_path):
+    graph_reps = np.random.default_rng(1).standard_normal((400, 16))
+    sink = MemorySink()
+    compute_cosine(graph_reps, 10, file_name=sink, verbose=False)
+    sample = np.array([3, 50, 77, 201, 399])
+    expected = [column[np.isin(sink.arrays()[0], sample)] for column in sink.arrays()]
+    target_nodes, nodes, values = cosine_rows(graph_reps, sample, 10)
+    assert np.array_equal(target_nodes, expected[0]) and np.array_equal(nodes, expected[1]) and np.array_equal(values, expected[2])
+
+    index = CosineIndex(n_lists=8).build(graph_reps)
+    assert index.vectors.dtype == np.float64 ## -- float64 vectors are not cast to float32
+    assert index.recall(sample, 10, index.n_lists, graph_reps=graph_reps)['recall'] == 1.0
+    assert index.recall(sample, 10, index.n_lists, sink)['recall'] == 1.0
+    index.save(str(tmp_path / 'index.npz'))
+    assert CosineIndex.load(str(tmp_path / 'index.npz')).vectors.dtype == np.float64
+    assert CosineIndex(n_lists=8, dtype=np.float32).build(graph_reps).vectors.dtype == np.float32
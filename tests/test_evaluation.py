@@ -0,0 +1,16 @@
+'''
+checks evaluate with explicit targets beyond the nodes of the label files
+'''
+from scipy.sparse import csr_matrix
+import numpy as np
+
+from evaluation import GroundTruth, evaluate
+
+
+def test_targets_without_labels():
+    ground_truth = GroundTruth(csr_matrix(np.array([[1, 0], [1, 0], [0, 1], [0, 1]]))) ## -- nodes 4 and 5 have no labels
+    results = (np.array([0, 0, 2]), np.array([1, 2, 3]), np.array([0.9, 0.5, 0.7]))
+    report = evaluate(results, ground_truth, topK=2, targets=[0, 2, 5], per_target=True)
+    assert report['# of targets'] == 3
+    assert np.allclose(report['precision@2 (per target)'], [0.5, 0.5, 0.0])
+    assert np.allclose(report['recall@2 (per target)'], [1.0, 1.0, 0.0])
@@ -0,0 +1,22 @@
+'''
+checks that a truncated cache file of load_graph is parsed again and rewritten
+'''
+import os
+
+import numpy as np
+
+from graph_loader import load_graph
+
+
+def test_truncated_cache(tmp_path):
+    graph = str(tmp_path / 'graph.txt')
+    with open(graph, 'w') as graph_file:
+        graph_file.write('0\t1\n1\t2\n2\t0\n2\t1\n')
+    csr_adj, ds_size = load_graph(graph)
+    with open(graph + '.npz', 'r+b') as cache_file: ## -- as left by a job killed while writing the cache
+        cache_file.truncate(os.path.getsize(graph + '.npz') // 2)
+    cached_adj, cached_size = load_graph(graph)
+    assert cached_size == ds_size and (cached_adj != csr_adj).nnz == 0
+    with np.load(graph + '.npz') as cache: ## -- the cache is rewritten and readable again
+        assert int(cache['ds_size']) == ds_size
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
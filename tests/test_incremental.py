@@ -0,0 +1,54 @@
+'''
+checks the iterations and the in-place updates of the incremental functions, and compares the updated scores with the
+ones computed again on the edited graph
+'''
+from scipy import sparse
+import numpy as np
+import pytest
+
+from checkpoint import load_checkpoint
+from incremental import apply_edges, update_jacsim, update_simrank
+from JacSim import JacSim_MF
+from SimRank import simrank
+from sinks import MemorySink
+
+
+def _graph():
+    return sparse.random(30, 30, density=0.1, format='csr', random_state=0)
+
+
+def test_update_rejects_no_iterations():
+    csr_adj = _graph()
+    with pytest.raises(ValueError):
+        update_simrank(np.identity(30), csr_adj, added=[(0, 1)], iterations=0)
+
+
+def test_update_changes_dense_scores_in_place():
+    csr_adj = _graph()
+    scores = np.identity(30)
+    updated, new_adj, _ = update_simrank(scores, csr_adj, added=[(0, 1), (2, 1)], iterations=3)
+    assert updated is scores
+    assert new_adj[0, 1] == csr_adj[0, 1] + 1
+    one_step = update_simrank(np.identity(30), csr_adj, added=[(0, 1), (2, 1)], iterations=1)[0]
+    assert not np.allclose(one_step, scores)
+
+
+def _scores(measure, csr_adj, checkpoint_file, **params):
+    '''
+        the converged scores of measure (120 iterations, C^120 < 1e-11), read back from its checkpoint
+    '''
+    measure(csr_adj, iterations=120, topK=5, file_name=MemorySink(), checkpoint_file=checkpoint_file, checkpoint_every=120, verbose=False, **params)
+    return load_checkpoint(checkpoint_file)['result_']
+
+
+@pytest.mark.parametrize('measure, update, params', [(simrank, update_simrank, {}), (JacSim_MF, update_jacsim, {'alpha': 0.4})])
+def test_update_matches_recomputation(tmp_path, measure, update, params):
+    csr_adj = _graph(); csr_adj.data[:] = 1.0
+    removed = [tuple(edge) for edge in np.transpose(csr_adj.nonzero())[:2].tolist()]
+    added = [(3, 7), (11, 7), (20, 25)]
+    scores = _scores(measure, csr_adj, str(tmp_path / 'old.npz'), **params)
+    updated, new_adj, _ = update(scores, csr_adj, added=added, removed=removed, iterations=120, verbose=False, **params)
+    assert (new_adj != apply_edges(csr_adj, added, removed)).nnz == 0
+    expected = _scores(measure, new_adj, str(tmp_path / 'new.npz'), **params)
+    assert not np.allclose(expected, _scores(measure, csr_adj, str(tmp_path / 'old.npz'), **params), rtol=0, atol=1e-6) ## -- the edges change the scores
+    np.testing.assert_allclose(updated, expected, rtol=0, atol=1e-9)
@@ -0,0 +1,32 @@
+'''
+checks the events of the measures and that a quiet run (or Instrument) prints nothing
+'''
+from scipy import sparse
+
+from instrument import Instrument
+from SimRank import simrank
+from sinks import MemorySink
+from top_k import write_blocks
+
+
+def test_events_of_a_pruned_run(capsys):
+    csr_adj = sparse.random(40, 40, density=0.1, format='csr', random_state=0)
+    events = []
+    report = simrank(csr_adj, iterations=3, topK=5, prune_threshold=1e-3, file_name=MemorySink(), instrument=events.append, verbose=False)
+    assert capsys.readouterr().out == ''
+    counters = {}
+    for event in events:
+        if event['event'] == 'counter':
+            counters.setdefault(event['name'], []).append(event['value'])
+    assert counters['residual'] == report['residuals']
+    assert counters['error_bound'] == report['error_bounds']
+    assert len(counters['dropped']) == 3
+    phases = [event['phase'] for event in events if event['event'] == 'phase']
+    assert phases.count('load') == 1 and phases.count('precompute') == 1 ## -- precompute is timed apart from load
+
+
+def test_write_blocks_follows_the_instrument(capsys):
+    write_blocks([], MemorySink(), instrument=Instrument(verbose=False))
+    assert capsys.readouterr().out == ''
+    write_blocks([], MemorySink(), instrument=Instrument())
+    assert capsys.readouterr().out == 'The result is written in the file...\n'
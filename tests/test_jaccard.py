@@ -0,0 +1,70 @@
+'''
+compares the vectorized Jaccard matrix and extra values with the pairwise loops of the original JacSim implementation
+'''
+from scipy.sparse import csr_matrix
+import numpy as np
+
+from jaccard import binary_adjacency, extra_values, extra_values_sparse, intersection_index, jaccard_coefficient
+
+
+def _graph():
+    '''
+        a small graph with self-loops, duplicated edges, and nodes without in-links
+    '''
+    rng = np.random.default_rng(7)
+    rows = list(rng.integers(0, 30, 120)) + [3, 3, 5, 8, 8, 8, 12]
+    cols = list(rng.integers(0, 28, 120)) + [3, 3, 5, 9, 9, 9, 12] ## -- (3,3), (5,5), (12,12) are self-loops; (3,3) and (8,9) are duplicated
+    ds_size = 30
+    return csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(ds_size, ds_size)), rows, cols
+
+
+def _pairwise(rows, cols, ds_size):
+    '''
+        the Jaccard matrix and the in-link pair dictionary computed by the pairwise loops of the original JacSim
+    '''
+    inlink_dict = {}
+    for node_1, node_2 in zip(rows, cols):
+        inlink_dict.setdefault(int(node_2), set()).add(int(node_1))
+    pair_rows = []; pair_cols = []; vals = []; in_link_pair_dict = {}
+    keyList = list(inlink_dict)
+    for target_node_index in range(0, len(keyList)):
+        for node_index in range(target_node_index, len(keyList)):
+            target_node = keyList[target_node_index]; node = keyList[node_index]
+            intersection = inlink_dict[target_node].intersection(inlink_dict[node])
+            if len(intersection) != 0:
+                union_size = len(inlink_dict[target_node].union(inlink_dict[node]))
+                pair_rows += [target_node, node]; pair_cols += [node, target_node]
+                vals += [len(intersection)/float(union_size)] * 2
+                in_link_pair_dict[(target_node, node)] = (intersection, len(inlink_dict[target_node])*len(inlink_dict[node]))
+    return csr_matrix((vals, (pair_rows, pair_cols)), shape=(ds_size, ds_size)), in_link_pair_dict
+
+
+def _pairwise_extra(result_, in_link_pair_dict, ds_size):
+    rows = []; cols = []; vals = []
+    for tople_ in in_link_pair_dict:
+        intersection_, multi_ = in_link_pair_dict[tople_]
+        sum_ = sum(result_[inlink_1, inlink_2] for inlink_1 in intersection_ for inlink_2 in intersection_)
+        rows += [tople_[0], tople_[1]]; cols += [tople_[1], tople_[0]]
+        vals += [sum_/float(multi_)] * 2
+    return csr_matrix((vals, (rows, cols)), shape=(ds_size, ds_size))
+
+
+def test_jaccard_coefficient_matches_pairwise():
+    csr_adj, rows, cols = _graph()
+    expected, _ = _pairwise(rows, cols, csr_adj.shape[0])
+    result = jaccard_coefficient(csr_adj)
+    assert abs(result - expected).max() < 1e-12
+    assert np.array_equal(np.sort(result.nonzero()[0]), np.sort(expected.nonzero()[0]))
+
+
+def test_extra_values_matches_pairwise():
+    csr_adj, rows, cols = _graph()
+    ds_size = csr_adj.shape[0]
+    _, in_link_pair_dict = _pairwise(rows, cols, ds_size)
+    index = intersection_index(csr_adj)
+    scores = np.random.default_rng(3).random((ds_size, ds_size))
+    for result_ in (scores + scores.T, csr_matrix(np.where(scores > 0.7, scores + scores.T, 0.0)), csr_matrix(np.where(scores + scores.T > 1.6, scores + scores.T, 0.0))):
+        expected = _pairwise_extra(result_ if isinstance(result_, np.ndarray) else result_.toarray(), in_link_pair_dict, ds_size)
+        assert abs(extra_values(result_, index) - expected).max() < 1e-12
+        assert abs(extra_values(result_, index, binary_adjacency(csr_adj)) - expected).max() < 1e-12
+        assert abs(extra_values_sparse(csr_matrix(result_), binary_adjacency(csr_adj)) - expected).max() < 1e-12
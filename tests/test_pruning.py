@@ -0,0 +1,68 @@
+'''
+compares the pruning of blocks of rows with a full sort of the scores of each row, and checks that JacSim and JPRank
+warn that pruning does not shrink their extra values
+'''
+from scipy import sparse
+import numpy as np
+import pytest
+
+from JacSim import JacSim_MF
+from JPRank import JPRank
+from pruning import prune, pruned_rows
+from sinks import MemorySink
+
+
+def _sorted_pruning(result_, threshold=None, top=None):
+    '''
+        the kept (row, column) pairs and the largest dropped score by sorting the scores of each row
+    '''
+    result_ = sparse.csr_matrix(result_)
+    result_.sort_indices()
+    rows = np.repeat(np.arange(result_.shape[0]), np.diff(result_.indptr))
+    magnitude = np.abs(result_.data)
+    keep = np.ones(len(magnitude), dtype=bool)
+    if threshold is not None:
+        keep &= magnitude >= threshold
+    if top is not None:
+        order = np.lexsort((result_.indices, -magnitude, rows))
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order)) - np.repeat(result_.indptr[:-1], np.diff(result_.indptr))
+        keep &= rank < top
+    keep |= rows == result_.indices
+    return set(zip(rows[keep].tolist(), result_.indices[keep].tolist())), float(magnitude[~keep].max()) if (~keep).any() else 0.0
+
+
+def _shuffled(result_, rng):
+    '''
+        returns result_ with the indices of each row in a random order, as the products of scipy.sparse
+    '''
+    result_ = result_.copy()
+    for row in range(result_.shape[0]):
+        start, end = result_.indptr[row], result_.indptr[row+1]
+        order = start + rng.permutation(end - start)
+        result_.indices[start:end] = result_.indices[order]; result_.data[start:end] = result_.data[order]
+    result_.has_sorted_indices = False
+    return result_
+
+
+def test_prune_matches_sorting():
+    rng = np.random.default_rng(0)
+    for trial in range(10):
+        result_ = sparse.random(120, 120, density=0.05 + 0.4 * rng.random(), random_state=trial, format='csr')
+        result_.data = (np.round(result_.data * 8) + 1) * rng.choice([-1, 1], result_.nnz) ## -- many tied scores
+        shuffled = _shuffled(result_, rng)
+        for threshold, top in ((None, 5), (4.0, None), (2.0, 3), (None, 1), (None, 500)):
+            expected, expected_dropped = _sorted_pruning(result_, threshold, top)
+            for block_size in (None, 7):
+                pruned, dropped = pruned_rows(lambda start, end: shuffled[start:end], 120, threshold, top, block_size)
+                pruned = pruned.tocoo()
+                assert set(zip(pruned.row.tolist(), pruned.col.tolist())) == expected and dropped == expected_dropped
+            assert (prune(result_.toarray(), threshold, top)[0] != prune(shuffled, threshold, top)[0]).nnz == 0
+
+
+def test_extra_values_warning():
+    csr_adj = sparse.random(30, 30, density=0.2, format='csr', random_state=0)
+    with pytest.warns(UserWarning, match='extra values of JacSim'):
+        JacSim_MF(csr_adj, 0.4, 2, 5, prune_threshold=1e-3, file_name=MemorySink(), verbose=False)
+    with pytest.warns(UserWarning, match='extra values of JPRank'):
+        JPRank(csr_adj, 0.4, 0.4, 0.5, 2, 5, prune_top=10, file_name=MemorySink(), verbose=False)
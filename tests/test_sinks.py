@@ -0,0 +1,26 @@
+'''
+checks that Sink is abstract and that empty outputs (e.g., all scores pruned) are read back quietly
+'''
+import warnings
+
+import numpy as np
+import pytest
+
+from sinks import Sink, open_sink, read_results
+
+
+def test_sink_is_abstract():
+    with pytest.raises(TypeError):
+        Sink()
+
+
+@pytest.mark.parametrize('name', ['result.txt', 'result.gz', 'result.npz', 'result.npy'])
+def test_empty_results(tmp_path, name):
+    file_name = str(tmp_path / name)
+    with open_sink(file_name):
+        pass
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        target_nodes, nodes, values = read_results(file_name)
+    assert len(target_nodes) == len(nodes) == len(values) == 0
+    assert np.issubdtype(target_nodes.dtype, np.integer)
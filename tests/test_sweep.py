@@ -0,0 +1,14 @@
+'''
+checks that a quiet sweep prints nothing
+'''
+from scipy import sparse
+
+from sweep import sweep
+
+
+def test_quiet_sweep(tmp_path, capsys):
+    csr_adj = sparse.random(30, 30, density=0.1, format='csr', random_state=0)
+    results = sweep({'random': csr_adj}, 'SimRank', grid={'tolerance': [0.0, 1e-3]}, out_dir=str(tmp_path), iterations=2, topK=3, verbose=False)
+    assert len(results) == 2 and capsys.readouterr().out == ''
+    sweep({'random': csr_adj}, 'SimRank', grid={'tolerance': [0.0]}, out_dir=str(tmp_path), iterations=2, topK=3)
+    assert 'Running SimRank on random' in capsys.readouterr().out
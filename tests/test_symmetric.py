@@ -0,0 +1,62 @@
+'''
+compares the products and gathers of SymmetricMatrix with the ones of the expanded dense matrix, and checks that the
+invalid arguments of the symmetric mode fail before the graph is read
+'''
+from scipy import sparse
+import numpy as np
+import pytest
+
+from JacSim import JacSim_MF
+from JPRank import JPRank
+from SimRank import simrank
+from SimRank_star import simrank_star
+from jaccard import extra_values, intersection_index
+from convergence import residual
+from symmetric import SymmetricMatrix, transposed_blocks
+
+
+def _packed(dense, block_size):
+    matrix = SymmetricMatrix(len(dense), block_size)
+    for block_i in range(matrix.n_blocks):
+        for block_j in range(block_i, matrix.n_blocks):
+            matrix.tile(block_i, block_j)[...] = dense[matrix.bounds[block_i]:matrix.bounds[block_i+1], matrix.bounds[block_j]:matrix.bounds[block_j+1]]
+    return matrix
+
+
+def test_symmetric_products():
+    rng = np.random.default_rng(0)
+    for ds_size, block_size in [(50, 7), (64, 16), (10, 32)]:
+        dense = rng.random((ds_size, ds_size)); dense += dense.T
+        matrix = _packed(dense, block_size)
+        norm_csr_adj = sparse.random(ds_size, ds_size, density=0.1, format='csr', random_state=1)
+        assert np.array_equal(matrix.toarray(), dense)
+        rows = rng.integers(0, ds_size, 500); cols = rng.integers(0, ds_size, 500)
+        assert np.array_equal(matrix.gather(rows, cols), dense[rows, cols])
+        for block_j in range(matrix.n_blocks):
+            assert np.array_equal(matrix.column_block(block_j), dense[:, matrix.bounds[block_j]:matrix.bounds[block_j+1]])
+
+        congruence = SymmetricMatrix(ds_size, block_size)
+        congruence.add_congruence(matrix, transposed_blocks(norm_csr_adj, block_size), 0.8)
+        assert np.allclose(congruence.toarray(), 0.8 * (norm_csr_adj.T @ dense @ norm_csr_adj))
+        star = SymmetricMatrix(ds_size, block_size)
+        star.add_star(matrix, norm_csr_adj, 0.4)
+        assert np.allclose(star.toarray(), 0.4 * (norm_csr_adj.T @ dense + dense @ norm_csr_adj))
+        for norm in ('max', 'fro'):
+            assert np.isclose(residual(congruence, matrix, norm), residual(congruence.toarray(), dense, norm))
+
+
+def test_symmetric_extra_values():
+    rng = np.random.default_rng(2)
+    ds_size = 60
+    csr_adj = sparse.random(ds_size, ds_size, density=0.15, format='csr', random_state=3)
+    dense = rng.random((ds_size, ds_size)); dense += dense.T
+    index = intersection_index(csr_adj, chunk_size=64)
+    expected = extra_values(dense, index).toarray()
+    assert np.allclose(extra_values(_packed(dense, 16), index).toarray(), expected)
+
+
+def test_invalid_arguments_fail_fast(tmp_path):
+    missing = str(tmp_path / 'missing.txt') ## -- reading it would raise another error
+    for measure in (simrank, simrank_star, JacSim_MF, JPRank):
+        with pytest.raises(ValueError, match='symmetric mode'):
+            measure(missing, iterations=1, topK=5, symmetric=True, prune_top=10)